@@ -1,12 +1,99 @@
 
 import argparse
+import codecs
 import json
+import mmap
+import os
 import sys
 import contextlib
-import pandas as pd
 from pathlib import Path
-from services.pipeline_service import PipelineService
-from services.master_data_service import MasterDataService
+
+from core.utils import save_grid, write_master_table
+
+try:
+    import orjson
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    # orjson not installed, fall back to stdlib json
+    orjson = None
+
+# Standard col_* options always offered in the paste mapping dropdown
+STD_COLS = ('invoice_id', 'col_qty_sf', 'col_amount', 'col_pallet_count',
+            'col_qty_pcs', 'col_net', 'col_gross', 'col_cbm', '(skip)')
+
+
+def emit(payload: dict) -> None:
+    """Writes a single JSON response line to stdout."""
+    if orjson is None:
+        print(json.dumps(payload, default=str))
+        return
+    
+    # Flush any pending text output so it doesn't interleave with the raw bytes
+    sys.stdout.flush()
+    sys.stdout.buffer.write(orjson.dumps(payload, default=str, option=ORJSON_OPTIONS) + b"\n")
+    sys.stdout.buffer.flush()
+
+
+def emit_ndjson(header: dict, records) -> None:
+    """
+    Writes a header line followed by one JSON line per record (NDJSON).
+    Records are serialized as they are produced, so the full payload is never held in memory.
+    """
+    emit(header)
+    if orjson is None:
+        for record in records:
+            print(json.dumps(record, default=str))
+        return
+    
+    write = sys.stdout.buffer.write
+    for record in records:
+        write(orjson.dumps(record, default=str, option=ORJSON_OPTIONS) + b"\n")
+    sys.stdout.buffer.flush()
+
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """
+    Sends everything written to stdout inside the block to stderr, at the file
+    descriptor level, so output from C extensions can't corrupt the JSON response.
+    Falls back to rebinding sys.stdout when stdout has no real descriptor.
+    """
+    try:
+        sys.stdout.flush()
+        saved_fd = os.dup(1)
+        os.dup2(2, 1)
+    except (AttributeError, OSError, ValueError):
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+        return
+    
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+
+
+def read_json(path: str):
+    """
+    Reads a JSON input file (tolerates a UTF-8 BOM written by the UI).
+    With orjson the file is memory-mapped and parsed in place, without first copying it into a bytes object.
+    """
+    if orjson is not None and os.path.getsize(path) > 0:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = len(codecs.BOM_UTF8) if mm[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+            with memoryview(mm) as view, view[start:] as body:
+                return orjson.loads(body)
+    
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if raw.startswith(codecs.BOM_UTF8):
+        raw = raw[len(codecs.BOM_UTF8):]
+    if orjson is None:
+        return json.loads(raw.decode('utf-8'))
+    return orjson.loads(raw)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Invoice Inspector CLI Adapter")
@@ -18,6 +105,7 @@ def main():
     cmd_run = subparsers.add_parser('inspect', help='Run inspection pipeline')
     cmd_run.add_argument('--folder', required=True, help='Invoice Folder Path')
     cmd_run.add_argument('--master', required=True, help='Master List Path')
+    cmd_run.add_argument('--ndjson', action='store_true', help='Stream one result per line after a header line')
     
     # Command: Parse Paste
     cmd_paste = subparsers.add_parser('parse_paste', help='Parse clipboard data')
@@ -28,6 +116,7 @@ def main():
     # Command: Load Master
     cmd_load = subparsers.add_parser('load_master', help='Load Master List Data')
     cmd_load.add_argument('--master', required=True, help='Master List Path')
+    cmd_load.add_argument('--ndjson', action='store_true', help='Stream one row per line after a header line')
 
     # Command: Save Master
     cmd_save = subparsers.add_parser('save_master', help='Save Master List Data')
@@ -45,18 +134,27 @@ def main():
     # Output structure: { "status": "ok", "data": ... } or { "status": "error", "message": ... }
     
     try:
+        # Services (and pandas behind them) are imported per command, so
+        # commands that don't need them (save_master) start up quickly
         if args.command == 'inspect':
-            with contextlib.redirect_stdout(sys.stderr):
+            from services.pipeline_service import PipelineService
+            
+            with stdout_to_stderr():
                 pipeline = PipelineService(args.folder, args.master)
                 output = pipeline.run()
             
             # Output structure: { "status": "ok", "data": [...], "missing": [...] }
             # Pipeline now returns { "results": [...], "missing": [...] }
-            print(json.dumps({
+            if args.ndjson:
+                # Header: { "status": "ok", "missing": [...] }, then one result object per line
+                emit_ndjson({"status": "ok", "missing": output['missing']}, output['results'])
+                return
+            
+            emit({
                 "status": "ok", 
                 "data": output['results'],
                 "missing": output['missing']
-            }, default=str))
+            })
             
         elif args.command == 'parse_paste':
             content = ""
@@ -66,101 +164,89 @@ def main():
             elif args.text:
                 content = args.text
             
+            from services.master_data_service import MasterDataService
             svc = MasterDataService(Path(args.master))
             rows, mapping, is_header = svc.parse_paste_data(content)
             
-            # Get available columns for dropdown
-            master_cols = list(svc.df.columns) if svc.df is not None else []
-            # Also add standard col_* options
-            std_cols = ['invoice_id', 'col_qty_sf', 'col_amount', 'col_pallet_count', 
-                        'col_qty_pcs', 'col_net', 'col_gross', 'col_cbm', '(skip)']
-            available = list(set(master_cols + std_cols))
+            # Get available columns for dropdown (master columns + standard col_* options)
+            master_cols = svc.df.columns if svc.df is not None else ()
+            available = sorted({*master_cols, *STD_COLS})
             
             # Serialize for generic UI
-            print(json.dumps({
+            emit({
                 "status": "ok",
                 "data": {
                     "rows": rows,
-                    "mapping": {str(k): v for k,v in mapping.items()}, # JS needs string keys
+                    "mapping": mapping, # int keys are emitted as JSON strings
                     "is_header": is_header,
-                    "available_columns": sorted(available)
+                    "available_columns": available
                 }
-            }))
+            })
             
         elif args.command == 'load_master':
+            from services.master_data_service import MasterDataService
             svc = MasterDataService(Path(args.master))
             if svc.load():
-                # Convert DF to list of lists (including header)
-                # handle NaN
-                df_to_send = svc.df.fillna('')
-                
                 # Apply Column Mapping (Rename Headers to col_id if mapped)
-                # col_map is { 'col_qty_sf': 'Original Name' }
-                # We need reverse map: { 'Original Name': 'col_qty_sf' }
-                reverse_map = {v: k for k, v in svc.col_map.items()}
+                # reverse_col_map is { 'Original Name': 'col_qty_sf' }
+                df_to_send = svc.df.rename(columns=svc.reverse_col_map)
+                columns = df_to_send.columns.tolist()
+                
+                # Object array of the cells; NaN/NaT become None (JSON null)
+                # in the same pass, without a fillna copy of the whole frame
+                values = df_to_send.to_numpy(dtype=object, na_value=None)
                 
-                new_columns = []
-                for col in df_to_send.columns:
-                    if col in reverse_map:
-                        new_columns.append(reverse_map[col])
-                    else:
-                        new_columns.append(col)
-                        
-                columns = new_columns
-                rows = df_to_send.values.tolist()
+                if args.ndjson:
+                    # Header: { "status": "ok", "columns": [...] }, then one row array per line,
+                    # each row converted to a list only as it is written
+                    emit_ndjson(
+                        {"status": "ok", "columns": columns},
+                        (row.tolist() for row in values)
+                    )
+                    return
                 
-                print(json.dumps({
+                emit({
                     "status": "ok",
                     "data": {
                         "columns": columns,
-                        "rows": rows
+                        "rows": values.tolist()
                     }
-                }, default=str))
+                })
             else:
-                 print(json.dumps({"status": "error", "message": "Could not load master file."}))
+                 emit({"status": "error", "message": "Could not load master file."})
 
         elif args.command == 'save_master':
             try:
                 if not args.file:
-                     print(json.dumps({"status": "error", "message": "No data file provided for save."}))
+                     emit({"status": "error", "message": "No data file provided for save."})
                      return
                 
-                # Check extension
-                is_csv = str(args.master).lower().endswith('.csv')
-
                 # Read JSON input
-                with open(args.file, 'r', encoding='utf-8-sig') as f:
-                    input_data = json.load(f)
+                input_data = read_json(args.file)
                 
-                # Reconstruct DF
                 cols = input_data.get('columns', [])
                 rows = input_data.get('rows', [])
                 
                 if not cols:
-                     print(json.dumps({"status": "error", "message": "No columns provided."}))
+                     emit({"status": "error", "message": "No columns provided."})
                 else:
-                    new_df = pd.DataFrame(rows, columns=cols)
-                    
-                    if is_csv:
-                        new_df.to_csv(args.master, index=False)
-                    else:
-                        new_df.to_excel(args.master, index=False)
-                        
-                    print(json.dumps({"status": "ok", "message": "Saved successfully."}))
+                    save_grid(args.master, cols, rows)
+                    emit({"status": "ok", "message": "Saved successfully."})
                 
             except Exception as e:
-                 print(json.dumps({"status": "error", "message": str(e)}))
+                 emit({"status": "error", "message": str(e)})
 
         elif args.command == 'merge_paste':
             try:
                 if not args.file:
-                     print(json.dumps({"status": "error", "message": "No data file provided for merge."}))
+                     emit({"status": "error", "message": "No data file provided for merge."})
                      return
                 
                 # 1. Load Master
+                from services.master_data_service import MasterDataService
                 svc = MasterDataService(Path(args.master))
                 if not svc.load():
-                     print(json.dumps({"status": "error", "message": "Could not load master file."}))
+                     emit({"status": "error", "message": "Could not load master file."})
                      return
                 
                 # 2. Read Paste Content
@@ -173,31 +259,29 @@ def main():
                 
                 # Override with user-edited mapping if provided
                 if args.mapping:
-                    with open(args.mapping, 'r', encoding='utf-8') as f:
-                        user_mapping_data = json.load(f)
-                        # user_mapping_data: {"mapping": {"0": "col_id", "1": "col_amount", ...}, "is_header": true}
-                        mapping = {int(k): v for k, v in user_mapping_data.get('mapping', {}).items()}
-                        is_header = user_mapping_data.get('is_header', is_header)
+                    user_mapping_data = read_json(args.mapping)
+                    # user_mapping_data: {"mapping": {"0": "col_id", "1": "col_amount", ...}, "is_header": true}
+                    mapping = {int(k): v for k, v in user_mapping_data.get('mapping', {}).items()}
+                    is_header = user_mapping_data.get('is_header', is_header)
                 
                 # 4. Apply Paste (Merge)
                 svc.apply_paste(rows, mapping, is_header)
                 
                 # 5. Save
-                is_csv = str(args.master).lower().endswith('.csv')
-                if is_csv:
-                    svc.df.to_csv(args.master, index=False)
-                else:
-                    svc.df.to_excel(args.master, index=False)
+                write_master_table(svc.df, args.master)
                     
-                print(json.dumps({"status": "ok", "message": "Merged and Saved successfully."}))
+                emit({"status": "ok", "message": "Merged and Saved successfully."})
                 
             except Exception as e:
                  import traceback
-                 print(json.dumps({"status": "error", "message": str(e) + "\n" + traceback.format_exc()}))
+                 emit({"status": "error", "message": str(e) + "\n" + traceback.format_exc()})
             
     except Exception as e:
-        print(json.dumps({"status": "error", "message": str(e)}))
+        emit({"status": "error", "message": str(e)})
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Lets extraction worker processes start from the frozen (PyInstaller) executable
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
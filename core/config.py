@@ -1,35 +1,76 @@
 
 import json
+from functools import lru_cache
 from pathlib import Path
+from typing import Mapping
 
 # Constants
 MAPPING_CONFIG_PATH = Path("mapping_config.json")
 REPORTS_DIR = Path("reports")
 
-def load_mapping_config() -> dict:
-    """Loads and normalizes the mapping configuration (Alias -> Canonical)."""
-    if not MAPPING_CONFIG_PATH.exists():
+class FrozenDict(dict):
+    """
+    Read-only dict for shared cached data. Mutating methods raise TypeError.
+    Unlike a MappingProxyType it can be pickled, e.g. to worker processes.
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+# Returned when mapping_config.json is missing or invalid
+EMPTY_MAPPING = FrozenDict()
+
+def normalize_header(text: str) -> str:
+    """
+    Canonical form of a header text for mapping lookups: lowercase, every run of
+    whitespace (spaces, line breaks, tabs, NBSP) folded to one space, ends trimmed.
+    Mapping keys are stored in this form, so cell text must be normalized the same way.
+    """
+    return ' '.join(text.lower().split())
+
+def load_mapping_config() -> Mapping[str, str]:
+    """
+    Loads and normalizes the mapping configuration (Alias -> Canonical).
+
+    The parsed result is cached per file modification time, so repeated calls
+    are a dict lookup until mapping_config.json is edited. The returned mapping is
+    shared between callers, so it is always a read-only FrozenDict (empty if the
+    file is missing or invalid).
+    """
+    try:
+        mtime_ns = MAPPING_CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
         print(f"Warning: {MAPPING_CONFIG_PATH} not found. Using empty mapping.")
-        return {}
-    
+        return EMPTY_MAPPING
+
+    return _load_mapping_config(str(MAPPING_CONFIG_PATH), mtime_ns)
+
+@lru_cache(maxsize=8)
+def _load_mapping_config(path_str: str, mtime_ns: int) -> Mapping[str, str]:
+    """Parses the mapping config at path_str. mtime_ns is only used as part of the cache key."""
     try:
-        with open(MAPPING_CONFIG_PATH, 'r', encoding='utf-8') as f:
+        with open(path_str, 'r', encoding='utf-8') as f:
             config = json.load(f)
-            
-        # Normalize mappings: Lowercase key -> Col ID
+
+        # Normalize mappings: normalize_header(key) -> Col ID
         normalized = {}
-        
+
         # Merge source 1: header_text_mappings
         if 'header_text_mappings' in config:
             for k, v in config['header_text_mappings'].get('mappings', {}).items():
-                normalized[k.lower().strip()] = v
-                
+                normalized[normalize_header(k)] = v
+
         # Merge source 2: shipping_list_header_map
         if 'shipping_list_header_map' in config:
             for k, v in config['shipping_list_header_map'].get('mappings', {}).items():
-                normalized[k.lower().strip()] = v
-                
-        return normalized
+                normalized[normalize_header(k)] = v
+
+        return FrozenDict(normalized)
     except Exception as e:
         print(f"Error loading mapping config: {e}")
-        return {}
+        return EMPTY_MAPPING
@@ -6,6 +6,7 @@ to JSON for display in the UI.
 """
 
 from enum import Enum
+from types import MappingProxyType
 from typing import Any, Dict, Optional
 
 
@@ -33,6 +34,13 @@ class ErrorCode(Enum):
     UNKNOWN_ERROR = "UNKNOWN_ERROR"
 
 
+# "[CODE] " message prefixes, built once instead of formatted on every raise
+_MESSAGE_PREFIX = {code: f"[{code.value}] " for code in ErrorCode}
+
+# Shared read-only context for errors raised without one (no empty dict per raise)
+_EMPTY_CONTEXT = MappingProxyType({})
+
+
 class ParsingError(Exception):
     """
     Base exception for all parsing-related errors.
@@ -42,7 +50,7 @@ class ParsingError(Exception):
         message: A user-friendly error message (can be in Thai or English).
         file_name: The name of the file being processed.
         sheet_name: The name of the sheet being processed (optional).
-        context: Additional context data for debugging (optional).
+        context: Additional context data for debugging (optional, read-only when empty).
     """
     
     def __init__(
@@ -57,10 +65,10 @@ class ParsingError(Exception):
         self.message = message
         self.file_name = file_name
         self.sheet_name = sheet_name
-        self.context = context or {}
+        self.context = context if context else _EMPTY_CONTEXT
         
         # Build the full exception message for logging
-        full_message = f"[{error_code.value}] {message}"
+        full_message = _MESSAGE_PREFIX[error_code] + message
         if file_name:
             full_message += f" (File: {file_name})"
         if sheet_name:
@@ -68,6 +76,13 @@ class ParsingError(Exception):
         
         super().__init__(full_message)
     
+    def __reduce__(self):
+        # Subclass __init__ signatures differ from args, so rebuild from the fields
+        # (needed to re-raise errors from extraction worker processes)
+        # The empty-context sentinel can't be pickled; None restores it on the other side
+        return (_rebuild_parsing_error, (type(self), self.error_code, self.message,
+                                         self.file_name, self.sheet_name, self.context or None))
+    
     def to_dict(self) -> Dict[str, Any]:
         """
         Serializes the exception to a dictionary for JSON output.
@@ -80,10 +95,17 @@ class ParsingError(Exception):
             "message": self.message,
             "file_name": self.file_name,
             "sheet_name": self.sheet_name,
-            "context": self.context
+            "context": dict(self.context)
         }
 
 
+def _rebuild_parsing_error(cls, error_code, message, file_name, sheet_name, context):
+    """Unpickles a ParsingError (or subclass) without going through the subclass __init__."""
+    error = cls.__new__(cls)
+    ParsingError.__init__(error, error_code, message, file_name, sheet_name, context)
+    return error
+
+
 # ============================================================================
 # Specific Exception Classes
 # ============================================================================
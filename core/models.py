@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Dict, List, Optional
 from enum import Enum
 
@@ -9,7 +10,17 @@ class VerificationStatus(Enum):
     EXTRACTED = "Extracted"
     UNKNOWN = "Unknown"
 
-@dataclass
+@dataclass(slots=True)
+class FileRecord:
+    """An invoice file found by scan_invoice_files, with the ID parsed from its name."""
+    original_path: Path
+    extracted_id: Optional[str] = None
+    original_name: str = ""
+    
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+@dataclass(slots=True)
 class InvoiceSheetData:
     """Data extracted from a single sheet (Invoice, Packing List, Contract)."""
     col_qty_sf: Optional[float] = None
@@ -21,20 +32,23 @@ class InvoiceSheetData:
     col_cbm: Optional[float] = None
     
     # Source workbook file name (for multi-file verification)
-    source_file: str = ""
+    source_file: Optional[str] = None
     
     # Set of column IDs detected as inspectable on this sheet
     # Populated by header matching and footer pattern detection
-    target_inspect_col: set = field(default_factory=set)
+    target_inspect_col: Optional[set] = None
+    
+    # Header detection result and worksheet title (set once the sheet is matched)
+    detection_info: Optional[Dict] = None
+    sheet_title: Optional[str] = None
     
     def to_dict(self):
-        result = {k: v for k, v in self.__dict__.items() if v is not None}
-        # Convert set to list for JSON serialization
-        if 'target_inspect_col' in result:
-            result['target_inspect_col'] = list(result['target_inspect_col'])
-        return result
+        # Unset fields are omitted, so a sheet only reports the values actually extracted from it
+        fields = ((k, getattr(self, k)) for k in self.__slots__)
+        # Convert set to a sorted list for stable JSON serialization
+        return {k: (sorted(v) if k == 'target_inspect_col' else v) for k, v in fields if v is not None}
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedInvoice:
     """Top-level object representing a processed invoice file."""
     file_path: str
@@ -55,10 +69,10 @@ class ExtractedInvoice:
     status: VerificationStatus = VerificationStatus.EXTRACTED
     
     # Raw Sheet Data
-    sheets: Dict[str, Dict] = field(default_factory=lambda: {
-        'Invoice': {},
-        'PackingList': {},
-        'Contract': {}
+    sheets: Dict[str, InvoiceSheetData] = field(default_factory=lambda: {
+        'Invoice': InvoiceSheetData(),
+        'PackingList': InvoiceSheetData(),
+        'Contract': InvoiceSheetData()
     })
     
     # Candidate Sheets (for Packing List mostly)
@@ -74,7 +88,8 @@ class ExtractedInvoice:
     
     def to_dict(self):
         """Serialization helper."""
-        d = self.__dict__.copy()
+        d = {k: getattr(self, k) for k in self.__slots__}
+        d['sheets'] = {name: sheet.to_dict() for name, sheet in self.sheets.items()}
         # Convert Enum if present
         if isinstance(d['status'], VerificationStatus):
             d['status'] = d['status'].value
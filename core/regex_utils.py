@@ -3,8 +3,12 @@ Regex utilities for searching and extracting data from Excel sheets.
 """
 
 import re
+from functools import lru_cache
 from typing import Pattern
 
+# First integer or decimal in a string (digits only, so no IGNORECASE needed)
+NUMBER_RE = re.compile(r'(\d+(?:\.\d+)?)')
+
 
 def regex_search_sheet(sheet, pattern: str | Pattern, max_row: int = 200, max_col: int = 30, 
                        case_insensitive: bool = True) -> list:
@@ -25,17 +29,21 @@ def regex_search_sheet(sheet, pattern: str | Pattern, max_row: int = 200, max_co
     
     # Compile pattern if string
     if isinstance(pattern, str):
-        flags = re.IGNORECASE if case_insensitive else 0
-        pattern = re.compile(pattern, flags)
+        pattern = _compile_pattern(pattern, case_insensitive)
+    
+    last_row = min(max_row, sheet.max_row or max_row)
+    last_col = min(max_col, sheet.max_column or max_col)
+    search = pattern.search
     
-    for row_idx in range(1, min(max_row + 1, (sheet.max_row or max_row) + 1)):
-        for col_idx in range(1, min(max_col + 1, (sheet.max_column or max_col) + 1)):
-            cell = sheet.cell(row=row_idx, column=col_idx)
-            if cell.value is None:
+    # Single bulk pass over plain values (no per-cell sheet.cell() lookups)
+    rows = sheet.iter_rows(min_row=1, max_row=last_row, max_col=last_col, values_only=True)
+    for row_idx, row in enumerate(rows, start=1):
+        for col_idx, value in enumerate(row, start=1):
+            if value is None:
                 continue
             
-            cell_str = str(cell.value)
-            match = pattern.search(cell_str)
+            cell_str = value if isinstance(value, str) else str(value)
+            match = search(cell_str)
             
             if match:
                 results.append({
@@ -68,6 +76,12 @@ def regex_search_first(sheet, pattern: str | Pattern, max_row: int = 200, max_co
     return results[0] if results else None
 
 
+@lru_cache(maxsize=128)
+def _compile_pattern(pattern: str, case_insensitive: bool) -> Pattern:
+    """Compiles a string pattern once per (pattern, flags); callers in loops pass the same literals."""
+    return re.compile(pattern, re.IGNORECASE if case_insensitive else 0)
+
+
 def regex_extract(text: str, pattern: str | Pattern, group: int = 1, 
                   default=None, case_insensitive: bool = True):
     """
@@ -87,10 +101,9 @@ def regex_extract(text: str, pattern: str | Pattern, group: int = 1,
         return default
     
     if isinstance(pattern, str):
-        flags = re.IGNORECASE if case_insensitive else 0
-        pattern = re.compile(pattern, flags)
+        pattern = _compile_pattern(pattern, case_insensitive)
     
-    match = pattern.search(str(text))
+    match = pattern.search(text if isinstance(text, str) else str(text))
     if match:
         try:
             return match.group(group)
@@ -110,10 +123,13 @@ def regex_extract_number(text: str, default: float = 0.0) -> float:
     Returns:
         Extracted number as float
     """
-    result = regex_extract(text, r'(\d+(?:\.\d+)?)', group=1, default=None)
-    if result is not None:
+    if text is None:
+        return default
+    
+    match = NUMBER_RE.search(text if isinstance(text, str) else str(text))
+    if match:
         try:
-            return float(result.replace(',', ''))
-        except:
+            return float(match.group(1).replace(',', ''))
+        except (ValueError, AttributeError):
             pass
     return default
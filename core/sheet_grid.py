@@ -0,0 +1,27 @@
+"""
+Plain-value snapshots of worksheets, so extractors never touch openpyxl Cell objects.
+"""
+
+
+class SheetGrid:
+    """
+    In-memory snapshot of a worksheet's values, read in one streaming pass of a
+    read-only worksheet. Extractors read plain values (rows, value()), never Cell objects.
+    """
+    __slots__ = ('title', 'rows', 'max_row', 'max_column')
+    
+    def __init__(self, worksheet):
+        # Ignore the stored <dimension> (can be stale) and read every row, like a normal load
+        worksheet.reset_dimensions()
+        self.title = worksheet.title
+        # rows[r - 1] holds row r's values from column 1; rows are not padded
+        self.rows = [tuple(row) for row in worksheet.iter_rows(values_only=True)]
+        self.max_row = len(self.rows)
+        self.max_column = max(map(len, self.rows), default=0)
+    
+    def value(self, row: int, column: int):
+        if 1 <= row <= self.max_row:
+            values = self.rows[row - 1]
+            if column <= len(values):
+                return values[column - 1]
+        return None
@@ -2,11 +2,22 @@
 Core utility functions for the Invoice Inspector application.
 """
 
+import contextlib
+import csv
 import os
 import subprocess
 import platform
+import uuid
 from pathlib import Path
 
+try:
+    import python_calamine  # noqa: F401 - backs pandas' Rust 'calamine' Excel engine
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    # python-calamine not installed, pandas picks its default engine
+    # (openpyxl, which pandas already opens read-only / values-only)
+    EXCEL_ENGINE = None
+
 
 def open_file(file_path: str | Path) -> bool:
     """
@@ -41,6 +52,92 @@ def open_file(file_path: str | Path) -> bool:
         return False
 
 
+def read_master_table(file_path: str | Path):
+    """
+    Reads a Master List (.csv or Excel) into a pandas DataFrame.
+    
+    Excel files are read with the calamine engine when it is installed
+    (much faster than openpyxl for plain cell values).
+    
+    Args:
+        file_path: Path to the Master List
+    
+    Returns:
+        DataFrame with the sheet's columns as-is
+    """
+    import pandas as pd  # deferred: only Master List callers need pandas
+    
+    file_path = Path(file_path)
+    if file_path.suffix.lower() == '.csv':
+        return pd.read_csv(file_path)
+    return pd.read_excel(file_path, engine=EXCEL_ENGINE)
+
+
+def write_master_table(df, file_path: str | Path) -> None:
+    """
+    Writes a Master List DataFrame back to .csv or Excel.
+    
+    Excel output is streamed row by row through save_grid instead of
+    DataFrame.to_excel, which builds the whole worksheet in memory (and writes
+    column by column, so it can't use xlsxwriter's constant_memory mode).
+    
+    Args:
+        df: Master List DataFrame
+        file_path: Destination path; the extension picks the format
+    """
+    if str(file_path).lower().endswith('.csv'):
+        df.to_csv(file_path, index=False)
+        return
+    
+    save_grid(file_path, df.columns.tolist(), df.to_numpy(dtype=object, na_value=None).tolist())
+
+
+def save_grid(path: str, columns: list, rows: list) -> None:
+    """
+    Writes grid data (header + rows) straight to CSV or XLSX.
+    Avoids building a DataFrame just to serialize it.
+    """
+    for i, row in enumerate(rows):
+        if len(row) != len(columns):
+            raise ValueError(f"Row {i} has {len(row)} values, expected {len(columns)} columns")
+    
+    if str(path).lower().endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(columns)
+            writer.writerows(rows)
+        return
+    
+    try:
+        import xlsxwriter
+    except ImportError:
+        # xlsxwriter not installed, use openpyxl's write-only mode
+        xlsxwriter = None
+    
+    if xlsxwriter is not None:
+        # constant_memory flushes each row to disk once the next one starts.
+        # Without a default date format, datetimes would be written as bare serial numbers.
+        wb = xlsxwriter.Workbook(path, {'constant_memory': True,
+                                        'default_date_format': 'yyyy-mm-dd hh:mm:ss'})
+        ws = wb.add_worksheet("Sheet1")
+        ws.write_row(0, 0, columns)
+        for i, row in enumerate(rows, start=1):
+            ws.write_row(i, 0, row)
+        wb.close()
+        return
+    
+    from openpyxl import Workbook
+    
+    # Write-only mode streams rows to disk instead of building the cell tree
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(columns)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+
 def open_file_location(file_path: str | Path) -> bool:
     """
     Opens the folder containing the file and selects it in Explorer.
@@ -74,6 +171,87 @@ def open_file_location(file_path: str | Path) -> bool:
         return False
 
 
+def list_excel_files(directory: str | Path) -> list:
+    """
+    Lists the .xlsx files, then the .xls files, directly inside a directory
+    (same result as globbing *.xlsx and *.xls) with a single os.scandir pass.
+    Extensions follow the filesystem's case rules, like glob.
+    """
+    xlsx, xls = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = os.path.normcase(entry.name)
+            if name.endswith('.xlsx'):
+                xlsx.append(Path(entry.path))
+            elif name.endswith('.xls'):
+                xls.append(Path(entry.path))
+    return xlsx + xls
+
+
+# ioctl request number for FICLONE (Linux reflink: Btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+
+def _clone_file(source_path: Path, target_path: Path) -> bool:
+    """
+    Tries to copy a file as a copy-on-write clone (no data is read or written).
+    Uses FICLONE on Linux and clonefile (cp -c) on macOS.
+    Returns False if the filesystem or platform doesn't support it.
+    """
+    system = platform.system()
+    
+    if system == 'Linux':
+        import fcntl
+        try:
+            # 'xb': only ever creates a fresh file, never truncates an existing one
+            with open(source_path, 'rb') as src, open(target_path, 'xb') as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return True
+        except OSError:
+            return False
+    
+    if system == 'Darwin':
+        result = subprocess.run(['cp', '-c', str(source_path), str(target_path)], capture_output=True)
+        return result.returncode == 0
+    
+    return False
+
+
+def copy_file_fast(source_path: str | Path, target_path: str | Path) -> None:
+    """
+    Copies a file with its metadata, like shutil.copy2.
+    A copy-on-write clone is tried first, which is near-instant on filesystems
+    that support it; otherwise shutil.copy2 (kernel-side copy where available).
+    
+    The copy is made into a temp file next to the target and only replaces the
+    target once it is complete, so a failed copy never leaves a truncated file.
+    Copying a file onto itself does nothing.
+    """
+    import shutil
+    
+    source_path = Path(source_path)
+    target_path = Path(target_path)
+    
+    try:
+        if os.path.samefile(source_path, target_path):
+            return
+    except OSError:
+        # Target (or source) missing: nothing to protect, the copy reports a missing source
+        pass
+    
+    tmp_path = target_path.with_name(f".{target_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        if _clone_file(source_path, tmp_path):
+            shutil.copystat(source_path, tmp_path)
+        else:
+            shutil.copy2(source_path, tmp_path)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            tmp_path.unlink()
+        raise
+
+
 def import_file(source_path: str | Path, target_dir: str | Path, overwrite: bool = False) -> Path | None:
     """
     Imports (copies) a file to the target directory.
@@ -86,16 +264,10 @@ def import_file(source_path: str | Path, target_dir: str | Path, overwrite: bool
     Returns:
         Path to the copied file, or None if failed
     """
-    import shutil
-    
     try:
         source_path = Path(source_path)
         target_dir = Path(target_dir)
         
-        if not source_path.exists():
-            print(f"Source file not found: {source_path}")
-            return None
-        
         # Create target directory if it doesn't exist
         target_dir.mkdir(parents=True, exist_ok=True)
         
@@ -106,7 +278,14 @@ def import_file(source_path: str | Path, target_dir: str | Path, overwrite: bool
             print(f"File already exists (skipping): {target_path.name}")
             return target_path
         
-        shutil.copy2(source_path, target_path)
+        # No exists() pre-check on the source: the copy reports a missing file itself
+        try:
+            copy_file_fast(source_path, target_path)
+        except FileNotFoundError as e:
+            if e.filename is None or Path(e.filename) != source_path:
+                raise
+            print(f"Source file not found: {source_path}")
+            return None
         print(f"Imported: {source_path.name}")
         return target_path
         
@@ -149,10 +328,7 @@ def delete_file(file_path: str | Path, to_trash: bool = True) -> bool:
     try:
         file_path = Path(file_path)
         
-        if not file_path.exists():
-            print(f"File not found: {file_path}")
-            return False
-        
+        # No exists() pre-check: unlink reports a missing file itself
         if to_trash and platform.system() == 'Windows':
             # Use send2trash if available, otherwise fall back to permanent delete
             try:
@@ -165,7 +341,11 @@ def delete_file(file_path: str | Path, to_trash: bool = True) -> bool:
                 pass
         
         # Permanent delete
-        file_path.unlink()
+        try:
+            file_path.unlink()
+        except FileNotFoundError:
+            print(f"File not found: {file_path}")
+            return False
         print(f"Deleted: {file_path.name}")
         return True
         
@@ -19,7 +19,7 @@ from pathlib import Path
 from typing import Union
 
 # Core extraction function
-from services.extraction_service import excel_data_extractor, scan_invoice_files
+from services.extraction_service import excel_data_extractor, extract_many, scan_invoice_files
 
 # Pipeline service for batch processing
 from services.pipeline_service import PipelineService
@@ -28,7 +28,7 @@ from services.pipeline_service import PipelineService
 from services.master_data_service import MasterDataService
 
 # Models
-from core.models import ExtractedInvoice, VerificationStatus
+from core.models import ExtractedInvoice, FileRecord, VerificationStatus
 
 # Exceptions - for catching errors
 from core.exceptions import (
@@ -65,20 +65,15 @@ def extract_invoice(file_path: Union[str, Path]) -> ExtractedInvoice:
         SheetError: If required sheets/headers not found (INVALID_SHIPPING_LIST)
         DataExtractionError: If data cannot be parsed
     """
-    file_path = Path(file_path)
-    
-    # Validate file exists
-    if not file_path.exists():
-        raise create_file_not_found_error(file_path.name)
-    
-    # Call the internal extractor
-    return excel_data_extractor(file_path)
+    # The extractor raises FILE_NOT_FOUND itself when the workbook can't be opened
+    return excel_data_extractor(Path(file_path))
 
 
 # Define public API
 __all__ = [
     # Main functions
     "extract_invoice",
+    "extract_many",
     "scan_invoice_files",
     
     # Services
@@ -87,6 +82,7 @@ __all__ = [
     
     # Models
     "ExtractedInvoice",
+    "FileRecord",
     "VerificationStatus",
     
     # Exceptions
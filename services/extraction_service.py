@@ -1,58 +1,102 @@
 
+import logging
+import os
 import re
+import string
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import zip_longest
 from pathlib import Path
 from openpyxl import load_workbook
-from typing import List, Dict, Set, Optional
-from core.config import load_mapping_config
-from core.models import ExtractedInvoice, VerificationStatus
+from typing import Iterable, Iterator, List, Dict, Mapping, Set, Optional, Tuple
+from core.config import load_mapping_config, normalize_header
+from core.models import ExtractedInvoice, FileRecord, VerificationStatus
 from core.regex_utils import regex_extract_number, regex_extract
 from core.exceptions import (
     create_file_not_found_error,
     create_invalid_shipping_list_error,
     create_unknown_error,
 )
+from core.sheet_grid import SheetGrid
+from core.utils import list_excel_files
+
+logger = logging.getLogger(__name__)
 
 # Config
 BLACKLIST_TERMS = ["buffalo", "cow", "leather"]
+# Pipeline outputs written next to the invoices; never scanned as input
+EXCLUDED_FILE_NAMES = frozenset({
+    "manual_review_needed.csv", "final_invoice_data.json", "rejection_report.csv",
+    "missing_invoices.csv", "verification_report.xlsx", "verification_report.csv",
+})
 
-def find_invoice_sheet(wb):
-    """Finds a sheet named like 'invoice', 'inv', etc."""
-    sheet_names = wb.sheetnames
-    for name in sheet_names:
-        lower_name = name.lower()
-        if 'invoice' in lower_name or 'inv' in lower_name:
-            return wb[name]
-    return None
-
-def find_contract_sheet(wb):
-    """Finds a sheet named like 'contract' or 'ct'."""
-    for sheet in wb:
-        title = sheet.title.lower().strip()
-        if 'contract' in title: return sheet
-        if title == 'ct': return sheet
-        if title.startswith('ct ') or title.startswith('ct-') or title.startswith('ct&') or title.startswith('ct_'):
-            return sheet
-        if title.endswith(' ct'): return sheet
-    return None
+# Precompiled patterns (hot paths call these once per cell / file)
+PALLET_TEXT_RE = re.compile(r'(.*?)\s*pallet', re.IGNORECASE)
+# Pallet count, in priority order: "10 pallets" / "10-pallet", then "pallets: 10", then any number.
+# Each lookahead finds its own leftmost match from the start of the text, so a single match()
+# gives the same result as searching the three patterns one after another.
+PALLET_COUNT_RE = re.compile(
+    r'(?=.*?(?P<count_before>\d+)\s*[-_]?\s*pallet)'
+    r'|(?=.*?pallet\w*\s*[:\-]?\s*(?P<count_after>\d+))'
+    r'|(?=.*?(?P<any_number>\d+))',
+    re.IGNORECASE | re.DOTALL
+)
+# Optional(Letters-) + Letters + OptionalHyphen + Digits + OptionalTrailingLetters
+FILENAME_ID_RE = re.compile(r'((?:[A-Z]+[-_])?[A-Z]+[-_]?\d+[A-Z]*)', re.IGNORECASE)
+# Leading words of filename tokens that look like IDs but are not (e.g. "COPY2", "V3", "REV-1")
+NOISE_ID_PREFIXES = frozenset({'COPY', 'XLS', 'V', 'PART', 'REV', 'VAL', 'NUM', 'NO'})
 
-def find_all_packing_list_sheets(wb):
-    """Finds ALL sheets that look like a packing list."""
-    sheets = []
+def classify_sheets(wb):
+    """
+    Sorts the workbook's sheets into roles in one pass over their titles.
+    Returns (invoice_sheet, packing_list_sheets, contract_sheet): the first sheet named like
+    'invoice'/'inv', ALL sheets that look like a packing list, and the first sheet named like
+    'contract'/'ct'. A sheet can fill several roles (e.g. 'CT&INV').
+    """
+    inv_sheet = None
+    packing_sheets = []
+    contract_sheet = None
+    
     for sheet in wb:
         title = sheet.title.lower()
+        
+        if inv_sheet is None and ('invoice' in title or 'inv' in title):
+            inv_sheet = sheet
+        
         # Must contain 'pack' or 'packing' - 'detail' alone is too generic
         if 'pack' in title or 'packing' in title:
-            sheets.append(sheet)
+            packing_sheets.append(sheet)
         elif 'weight' in title and ('gross' in title or 'net' in title):
             # Allow weight-related sheets only if they have gross/net context
-            sheets.append(sheet)
-    return sheets
+            packing_sheets.append(sheet)
+        
+        if contract_sheet is None:
+            ct_title = title.strip()
+            if ('contract' in ct_title or ct_title == 'ct' or ct_title.endswith(' ct')
+                    or ct_title.startswith(('ct ', 'ct-', 'ct&', 'ct_'))):
+                contract_sheet = sheet
+    
+    return inv_sheet, packing_sheets, contract_sheet
+
+def _to_num(value) -> float:
+    """Cell value as a float: numbers directly, text via its first number, anything else 0.0."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return regex_extract_number(value, default=0.0)
+    return 0.0
+
+def format_val(v):
+    """Flattened field value: numbers as-is, missing as "N/A", anything else as text."""
+    if v is None or v == "N/A": return "N/A"
+    if isinstance(v, (int, float)): return v
+    return str(v)
 
 def extract_pallet_info(cell_value):
     """Extracts text to the left of 'pallet'."""
     if not isinstance(cell_value, str):
         return None
-    result = regex_extract(cell_value, r'(.*?)\s*pallet', group=1)
+    result = regex_extract(cell_value, PALLET_TEXT_RE, group=1)
     return result.strip() if result else None
 
 def detect_inspectable_columns(sheet, mapping_dict) -> set:
@@ -70,6 +114,9 @@ def detect_inspectable_columns(sheet, mapping_dict) -> set:
     best_col_ids = set()
     best_match_count = 0
     
+    # Cell texts for the failure dump are only collected when debug logging is on
+    debug = logger.isEnabledFor(logging.DEBUG)
+    
     # STEP 1: Find the widest rows (most populated cells)
     row_cell_counts = {}
     row_cells_data = {}
@@ -79,12 +126,11 @@ def detect_inspectable_columns(sheet, mapping_dict) -> set:
         cells = []
         
         for col in range(1, max_col + 1):
-            cell_val = sheet.cell(row=row, column=col).value
+            cell_val = sheet.value(row, col)
             if cell_val:
                 cell_count += 1
-                text = str(cell_val).strip()
-                text_lower = text.lower().replace('\n', ' ').replace('  ', ' ')
-                cells.append(text_lower[:30])
+                if debug:
+                    cells.append(normalize_header(str(cell_val))[:30])
         
         if cell_count > 0:
             row_cell_counts[row] = cell_count
@@ -105,12 +151,12 @@ def detect_inspectable_columns(sheet, mapping_dict) -> set:
         match_count = 0
         
         for col in range(1, max_col + 1):
-            cell_val = sheet.cell(row=row, column=col).value
-            if not cell_val:
+            cell_val = sheet.value(row, col)
+            # Headers are text; numeric data cells can't match a mapping key
+            if not cell_val or not isinstance(cell_val, str):
                 continue
             
-            text = str(cell_val).strip()
-            text_lower = text.lower().replace('\n', ' ').replace('  ', ' ')
+            text_lower = normalize_header(cell_val)
             
             if text_lower in mapping_dict:
                 col_id = mapping_dict[text_lower]
@@ -118,12 +164,13 @@ def detect_inspectable_columns(sheet, mapping_dict) -> set:
                 row_matches.append(text_lower[:20])
                 match_count += 1
         
-        debug_rows[row] = {
-            'cells': row_cells_data[row],
-            'matches': row_matches,
-            'count': match_count,
-            'cell_count': cell_count
-        }
+        if debug:
+            debug_rows[row] = {
+                'cells': row_cells_data[row],
+                'matches': row_matches,
+                'count': match_count,
+                'cell_count': cell_count
+            }
         
         # Pick this row if it has 3+ matches and is better than current best
         if match_count >= 3 and match_count > best_match_count:
@@ -136,17 +183,16 @@ def detect_inspectable_columns(sheet, mapping_dict) -> set:
         subheader_row = best_row + 1
         subheader_matches = []
         for col in range(1, max_col + 1):
-            cell_val = sheet.cell(row=subheader_row, column=col).value
-            if not cell_val:
+            cell_val = sheet.value(subheader_row, col)
+            if not cell_val or not isinstance(cell_val, str):
                 continue
-            text = str(cell_val).strip()
-            text_lower = text.lower().replace('\n', ' ').replace('  ', ' ')
+            text_lower = normalize_header(cell_val)
             if text_lower in mapping_dict:
                 col_id = mapping_dict[text_lower]
                 best_col_ids.add(col_id)
                 subheader_matches.append(f"{text_lower}={col_id}")
         if subheader_matches:
-            print(f"    Subheader row {subheader_row}: {subheader_matches}")
+            logger.debug("Subheader row %d: %s", subheader_row, subheader_matches)
     
     # Filter to only verification-relevant col_ids
     verification_cols = {'col_qty_sf', 'col_amount', 'col_pallet_count', 
@@ -162,18 +208,19 @@ def detect_inspectable_columns(sheet, mapping_dict) -> set:
     
     # STRICT: Log warning if no header cluster found
     if best_row == -1:
-        print(f"  WARNING: No header row found in sheet '{sheet.title}' (need 3+ matching headers)")
+        logger.warning("No header row found in sheet '%s' (need 3+ matching headers)", sheet.title)
         # DEBUG: Show widest rows and their matches
-        print(f"    DEBUG: Top widest rows checked (by cell count):")
-        for row, cell_count in sorted_rows[:5]:
-            d = debug_rows.get(row, {})
-            matches = d.get('matches', [])
-            cells = d.get('cells', [])
-            print(f"      Row {row}: {cell_count} cells, {len(matches)} matches -> {matches}")
-            print(f"        Cells: {cells[:6]}...")
+        if debug:
+            logger.debug("Top widest rows checked (by cell count):")
+            for row, cell_count in sorted_rows[:5]:
+                d = debug_rows.get(row, {})
+                matches = d.get('matches', [])
+                cells = d.get('cells', [])
+                logger.debug("  Row %d: %d cells, %d matches -> %s", row, cell_count, len(matches), matches)
+                logger.debug("    Cells: %s...", cells[:6])
         detection_info['warning'] = f"No header row found (need 3+ matches)"
     else:
-        print(f"  Detected headers (row {best_row}): {list(inspectable)}")
+        logger.debug("Detected headers (row %d): %s", best_row, inspectable)
     
     return inspectable, detection_info
 
@@ -183,64 +230,74 @@ def identify_column_type(sheet, row_idx, col_idx, mapping_dict):
     Returns the mapped col_id (e.g., 'col_qty_sf', 'col_amount') if found, else None.
     """
     for r in range(row_idx - 1, 0, -1):
-        cell_val = sheet.cell(row=r, column=col_idx).value
-        if not cell_val:
-            continue
-        
-        text = str(cell_val).lower().strip().replace('\n', ' ')
-        if text in mapping_dict:
-            return mapping_dict[text]
-            
-        if 'total' in text and 'value' in text: return 'col_amount'
-        if 'amount' in text: return 'col_amount'
+        col_type = _header_col_type(sheet.value(r, col_idx), mapping_dict)
+        if col_type:
+            return col_type
              
     return None
 
+def identify_row_column_types(sheet, row_idx, mapping_dict) -> Dict[int, str]:
+    """
+    identify_column_type for every non-empty cell of row_idx at once.
+    Walks the rows above a single time (nearest header first) and stops as soon as
+    every column is resolved, instead of one upward walk per cell.
+    Returns {col_idx: col_id} for the columns whose header was found.
+    """
+    pending = {col_idx for col_idx, value in enumerate(sheet.rows[row_idx - 1], start=1) if value is not None}
+    found = {}
+    for r in range(row_idx - 1, 0, -1):
+        if not pending:
+            break
+        row = sheet.rows[r - 1]
+        for col_idx in [c for c in pending if c <= len(row)]:
+            col_type = _header_col_type(row[col_idx - 1], mapping_dict)
+            if col_type:
+                found[col_idx] = col_type
+                pending.discard(col_idx)
+    
+    return found
+
+def _header_col_type(cell_val, mapping_dict) -> Optional[str]:
+    """Maps one header cell to a col_id (config match, then amount heuristics); None if it is not a header."""
+    # Numbers, dates etc. are data, never header text
+    if not cell_val or not isinstance(cell_val, str):
+        return None
+    
+    text = normalize_header(cell_val)
+    if text in mapping_dict:
+        return mapping_dict[text]
+    
+    if 'total' in text and 'value' in text: return 'col_amount'
+    if 'amount' in text: return 'col_amount'
+    return None
+
 def find_smart_total_row(sheet_values, sheet_formulas) -> int:
     """
     Identifies the best 'Total' row index.
+    Walks the value and formula snapshots of the sheet side by side in a single pass.
     """
     best_row_idx = -1
     max_score = 0
     
-    # Iterate rows
-    # Note: sheet_values and sheet_formulas must be openpyxl sheet objects/iterators
-    # To avoid iterating entire sheet, we assume reasonable size or just first 100?
-    # Original logic iterated all.
-    
-    for row in sheet_values.iter_rows():
-        row_idx = row[0].row
-        has_total = False
-        has_blacklist = False
-        
-        for cell in row:
-            if cell.value and isinstance(cell.value, str):
-                v = cell.value.lower()
-                for term in BLACKLIST_TERMS:
-                    if term in v:
-                        has_blacklist = True
-                        break
-                if has_blacklist: break
-                
-                if 'total' in v:
-                    has_total = True
-        
-        if has_blacklist or not has_total:
+    rows = zip_longest(sheet_values.rows, sheet_formulas.rows, fillvalue=())
+    for row_idx, (values, formulas) in enumerate(rows, start=1):
+        # Blank/spacer rows (all None, 0 or '') cannot hold a label; any() rejects them without the join
+        if not any(values):
+            continue
+        # One lowered string per row; terms have no spaces, so matches never span two cells
+        row_text = ' '.join(v for v in values if isinstance(v, str)).lower()
+        if 'total' not in row_text or any(term in row_text for term in BLACKLIST_TERMS):
             continue
             
-        # Check formulas
+        # Check formulas (same row of the formula snapshot)
         formula_score = 0
-        try:
-            f_row = sheet_formulas[row_idx]
-            for cell in f_row:
-                if cell.value and isinstance(cell.value, str):
-                    fv = cell.value.upper()
-                    if str(fv).startswith('=SUM'):
-                        formula_score += 2
-                    elif '+' in str(fv) and '=' in str(fv):
-                         formula_score += 1
-        except Exception:
-            pass
+        for formula in formulas:
+            if formula and isinstance(formula, str):
+                fv = formula.upper()
+                if fv.startswith('=SUM'):
+                    formula_score += 2
+                elif '+' in fv and '=' in fv:
+                     formula_score += 1
             
         current_score = 1 + formula_score
         if current_score > max_score:
@@ -259,21 +316,19 @@ def extract_packing_list_data(sheet_values, sheet_formulas, mapping_dict) -> dic
     if row_idx == -1: return {}
     
     try:
-        row = sheet_values[row_idx]
-        for cell in row:
-             if cell.value is None: continue 
-             c_type = identify_column_type(sheet_values, row_idx, cell.column, mapping_dict)
+        row = sheet_values.rows[row_idx - 1]
+        col_types = identify_row_column_types(sheet_values, row_idx, mapping_dict)
+        for col_idx, val in enumerate(row, start=1):
+             if val is None: continue 
+             c_type = col_types.get(col_idx)
              try:
-                 val = cell.value
-                 if val is None: continue
-                 val_str = str(val).strip()
-                 num = regex_extract_number(val_str, default=0.0)
+                 num = _to_num(val)
 
                  # Pallet Text Search
-                 if 'pallet' in val_str.lower():
-                     m_pal = re.search(r'(\d+)\s*[-_]?\s*pallet', val_str, re.IGNORECASE) or re.search(r'pallet\w*\s*[:\-]?\s*(\d+)', val_str, re.IGNORECASE) or re.search(r'(\d+)', val_str)
+                 if isinstance(val, str) and 'pallet' in val.lower():
+                     m_pal = PALLET_COUNT_RE.match(val)
                      if m_pal:
-                         p_val = int(float(m_pal.group(1)))
+                         p_val = int(float(m_pal.group(m_pal.lastindex)))
                          if p_val > 0: data['col_pallet_count'] = p_val
                  
                  if num == 0.0: continue
@@ -286,8 +341,8 @@ def extract_packing_list_data(sheet_values, sheet_formulas, mapping_dict) -> dic
                  elif c_type == 'col_qty_sf': data['col_qty_sf'] = num
                  elif c_type == 'col_amount': data['col_amount'] = num
              except: pass
-    except Exception as e:
-        print(f"Error extracting packing list row: {e}")
+    except Exception:
+        logger.exception("Error extracting packing list row")
 
     # Clean result
     res = {}
@@ -305,42 +360,36 @@ def extract_contract_data(sheet_values, sheet_formulas, mapping_dict) -> dict:
     data = {'col_qty_sf': 0.0, 'col_amount': 0.0}
     total_row_idx = find_smart_total_row(sheet_values, sheet_formulas)
     if total_row_idx == -1: 
-        print("  WARNING: No Total row found in Contract sheet")
+        logger.warning("No Total row found in Contract sheet")
         return data
 
     try:
-        row = sheet_values[total_row_idx]
-        
-        def get_float(cell):
-            if cell.value:
-                if isinstance(cell.value, str):
-                    return regex_extract_number(cell.value, default=0.0)
-                if isinstance(cell.value, (int, float)): 
-                    return float(cell.value)
-            return 0.0
+        row = sheet_values.rows[total_row_idx - 1]
         
         # Use dynamic column detection instead of hardcoded indices
-        for cell in row:
-            if cell.value is None:
+        col_types = identify_row_column_types(sheet_values, total_row_idx, mapping_dict)
+        for col_idx, value in enumerate(row, start=1):
+            if value is None:
                 continue
-            col_type = identify_column_type(sheet_values, total_row_idx, cell.column, mapping_dict)
-            val = get_float(cell)
+            col_type = col_types.get(col_idx)
+            val = _to_num(value)
             if val > 0:
                 if col_type == 'col_qty_sf':
                     data['col_qty_sf'] = val
                 elif col_type == 'col_amount':
                     data['col_amount'] = val
                     
-    except Exception as e:
-        print(f"Error reading contract row: {e}")
+    except Exception:
+        logger.exception("Error reading contract row")
     return data
 
-def excel_data_extractor(file_path: Path) -> ExtractedInvoice:
+def excel_data_extractor(file_path: Path, mapping_dict: Optional[Mapping[str, str]] = None) -> ExtractedInvoice:
     """
     Main extraction logic for a single file.
     
     Args:
         file_path: Path to the Excel file
+        mapping_dict: Header alias -> col_id mapping; loaded from mapping_config.json if not given
         
     Returns:
         ExtractedInvoice object with extracted data
@@ -351,18 +400,21 @@ def excel_data_extractor(file_path: Path) -> ExtractedInvoice:
     """
     file_path = Path(file_path)
     
-    # Validate file exists
-    if not file_path.exists():
-        raise create_file_not_found_error(file_path.name)
-    
-    mapping_dict = load_mapping_config()
+    if mapping_dict is None:
+        mapping_dict = load_mapping_config()
     
     # Initialize Model
     result = ExtractedInvoice(file_path=str(file_path), file_name=file_path.name)
     
     try:
-        wb = load_workbook(file_path, data_only=True)
-        wb_formulas = load_workbook(file_path, data_only=False)
+        # Read-only: sheets are streamed on demand instead of building a full cell tree
+        wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            wb_formulas = load_workbook(file_path, read_only=True, data_only=False, keep_links=False)
+        except BaseException:
+            # Release the first handle too (an open read-only workbook locks the file on Windows)
+            wb.close()
+            raise
     except FileNotFoundError:
         raise create_file_not_found_error(file_path.name)
     except PermissionError as e:
@@ -380,86 +432,110 @@ def excel_data_extractor(file_path: Path) -> ExtractedInvoice:
 
     total_sheet_count = len(wb.sheetnames)
     matched_sheet_count = 0
+    
+    # Snapshot each matched sheet (values + formulas) once, then release the files.
+    # A sheet can match several roles (e.g. 'CT&INV'); it is still read only once.
+    grids = {}
+    formula_grids = {}
+    try:
+        inv_ws, packing_ws, contract_ws = classify_sheets(wb)
+        
+        for ws in [inv_ws, contract_ws, *packing_ws]:
+            if ws is not None and ws.title not in grids:
+                grids[ws.title] = SheetGrid(ws)
+                formula_grids[ws.title] = SheetGrid(wb_formulas[ws.title])
+    except Exception as e:
+        raise create_unknown_error(
+            file_name=file_path.name,
+            original_exception=e,
+            operation="Reading worksheets"
+        )
+    finally:
+        wb.close()
+        wb_formulas.close()
 
     # 1. Invoice
-    inv_sheet = find_invoice_sheet(wb)
+    inv_sheet = grids[inv_ws.title] if inv_ws else None
     if inv_sheet:
         matched_sheet_count += 1
         result.sheet_status['Invoice'] = True
-        inv_sheet_formulas = wb_formulas[inv_sheet.title]
+        inv_sheet_formulas = formula_grids[inv_sheet.title]
         
         # Detect inspectable columns for this sheet
         inv_inspectable, inv_detection = detect_inspectable_columns(inv_sheet, mapping_dict)
-        result.sheets['Invoice']['target_inspect_col'] = list(inv_inspectable)
-        result.sheets['Invoice']['detection_info'] = inv_detection
-        result.sheets['Invoice']['sheet_title'] = inv_sheet.title
+        inv_data = result.sheets['Invoice']
+        inv_data.target_inspect_col = inv_inspectable
+        inv_data.detection_info = inv_detection
+        inv_data.sheet_title = inv_sheet.title
         
         data_row_idx = find_smart_total_row(inv_sheet, inv_sheet_formulas)
         if data_row_idx != -1:
              found_cols = {}
-             row_cells = inv_sheet[data_row_idx]
-             for cell in row_cells:
-                  if cell.value is not None:
-                      c_type = identify_column_type(inv_sheet, cell.row, cell.column, mapping_dict)
-                      if c_type: found_cols[c_type] = cell.column
+             row_values = inv_sheet.rows[data_row_idx - 1]
+             # Left to right, so the rightmost column of a type wins
+             for col_idx, c_type in sorted(identify_row_column_types(inv_sheet, data_row_idx, mapping_dict).items()):
+                  found_cols[c_type] = col_idx
              
              def get_v(c_type):
                  col = found_cols.get(c_type)
-                 if col: return inv_sheet.cell(row=data_row_idx, column=col).value
+                 if col: return inv_sheet.value(data_row_idx, col)
                  return None
              
-             result.sheets['Invoice']['col_amount'] = get_v('col_amount') or "N/A"
-             result.sheets['Invoice']['col_qty_sf'] = get_v('col_qty_sf') or "N/A"
+             inv_data.col_amount = get_v('col_amount') or "N/A"
+             inv_data.col_qty_sf = get_v('col_qty_sf') or "N/A"
              
              pal_val = get_v('col_pallet_count')
              pal_regex_val = None
-             for cell in row_cells:
-                 if isinstance(cell.value, str) and 'pallet' in cell.value.lower():
-                     pal_regex_val = extract_pallet_info(cell.value)
+             for value in row_values:
+                 if isinstance(value, str) and 'pallet' in value.lower():
+                     pal_regex_val = extract_pallet_info(value)
              
              final_p = pal_val if pal_val else pal_regex_val
              if final_p:
                   if isinstance(final_p, str):
                        num = regex_extract_number(final_p, default=0.0)
                        final_p = int(num) if num == int(num) else num
-                  result.sheets['Invoice']['col_pallet_count'] = final_p
+                  inv_data.col_pallet_count = final_p
 
 
     # 2. Packing List
-    packing_sheets = find_all_packing_list_sheets(wb)
+    packing_sheets = [grids[ws.title] for ws in packing_ws]
     pack_data = {}
     if packing_sheets:
         matched_sheet_count += len(packing_sheets)
         result.sheet_status['PackingList'] = True
         
         for idx, p_sheet in enumerate(packing_sheets):
-            p_formulas = wb_formulas[p_sheet.title]
+            p_formulas = formula_grids[p_sheet.title]
             p_data = extract_packing_list_data(p_sheet, p_formulas, mapping_dict)
             result.packing_candidates.append({'sheet_name': p_sheet.title, 'data': p_data})
             if idx == 0: pack_data = p_data
 
+        pl_data = result.sheets['PackingList']
         for k, v in pack_data.items():
-            result.sheets['PackingList'][k] = v
+            setattr(pl_data, k, v)
         
         # Detect inspectable columns for packing list (use first sheet)
         pl_inspectable, pl_detection = detect_inspectable_columns(packing_sheets[0], mapping_dict)
-        result.sheets['PackingList']['target_inspect_col'] = list(pl_inspectable)
-        result.sheets['PackingList']['detection_info'] = pl_detection
-        result.sheets['PackingList']['sheet_title'] = packing_sheets[0].title
+        pl_data.target_inspect_col = pl_inspectable
+        pl_data.detection_info = pl_detection
+        pl_data.sheet_title = packing_sheets[0].title
 
     # 3. Contract
-    contract_sheet = find_contract_sheet(wb)
+    contract_sheet = grids[contract_ws.title] if contract_ws else None
     if contract_sheet:
         matched_sheet_count += 1
         result.sheet_status['Contract'] = True
-        c_data = extract_contract_data(contract_sheet, wb_formulas[contract_sheet.title], mapping_dict)
-        result.sheets['Contract'] = c_data
+        c_data = extract_contract_data(contract_sheet, formula_grids[contract_sheet.title], mapping_dict)
+        ct_data = result.sheets['Contract']
+        for k, v in c_data.items():
+            setattr(ct_data, k, v)
         
         # Detect inspectable columns for contract
         ct_inspectable, ct_detection = detect_inspectable_columns(contract_sheet, mapping_dict)
-        result.sheets['Contract']['target_inspect_col'] = list(ct_inspectable)
-        result.sheets['Contract']['detection_info'] = ct_detection
-        result.sheets['Contract']['sheet_title'] = contract_sheet.title
+        ct_data.target_inspect_col = ct_inspectable
+        ct_data.detection_info = ct_detection
+        ct_data.sheet_title = contract_sheet.title
 
     # VALIDATION: Check if any sheet had successful header detection
     # If we found sheets but couldn't detect headers, it's an invalid shipping list
@@ -467,11 +543,11 @@ def excel_data_extractor(file_path: Path) -> ExtractedInvoice:
     failed_sheets = []
     
     for sheet_type in ['Invoice', 'PackingList', 'Contract']:
-        sheet_data = result.sheets.get(sheet_type, {})
-        detection_info = sheet_data.get('detection_info', {})
+        sheet_data = result.sheets[sheet_type]
+        detection_info = sheet_data.detection_info or {}
         if detection_info.get('status') == 'failed':
             header_detection_failed = True
-            sheet_title = sheet_data.get('sheet_title', sheet_type)
+            sheet_title = sheet_data.sheet_title or sheet_type
             failed_sheets.append(sheet_title)
     
     # Only raise if we found sheets but ALL of them failed header detection
@@ -481,22 +557,17 @@ def excel_data_extractor(file_path: Path) -> ExtractedInvoice:
             reason=f"Header detection failed on all sheets: {failed_sheets}"
         )
 
-    # Formatting & Flattening
-    def format_val(v):
-        if v is None or v == "N/A": return "N/A"
-        if isinstance(v, (int, float)): return v
-        return str(v)
-
-    # Flatten & Track Sources
+    # Flatten & Track Sources (values formatted as they are assigned)
     # Invoice
     inv_name = inv_sheet.title if inv_sheet else "Unknown"
-    result.col_amount = format_val(result.sheets['Invoice'].get('col_amount'))
+    inv_data = result.sheets['Invoice']
+    result.col_amount = format_val(inv_data.col_amount)
     result.sources['col_amount'] = inv_name
     
-    result.col_qty_sf = format_val(result.sheets['Invoice'].get('col_qty_sf'))
+    result.col_qty_sf = format_val(inv_data.col_qty_sf)
     result.sources['col_qty_sf'] = inv_name
     
-    result.col_pallet_count = format_val(result.sheets['Invoice'].get('col_pallet_count'))
+    result.col_pallet_count = format_val(inv_data.col_pallet_count)
     result.sources['col_pallet_count'] = inv_name
     
     # Packing List (Assuming first candidate is used)
@@ -506,69 +577,119 @@ def excel_data_extractor(file_path: Path) -> ExtractedInvoice:
          # Find the sheet that provided the data (simplified: assumes first one used for pack_data)
          pl_name = packing_sheets[0].title 
     
-    result.col_qty_pcs = format_val(pl.get('col_qty_pcs'))
+    result.col_qty_pcs = format_val(pl.col_qty_pcs)
     result.sources['col_qty_pcs'] = pl_name
     
-    result.col_net = format_val(pl.get('col_net'))
+    result.col_net = format_val(pl.col_net)
     result.sources['col_net'] = pl_name
     
-    result.col_gross = format_val(pl.get('col_gross'))
+    result.col_gross = format_val(pl.col_gross)
     result.sources['col_gross'] = pl_name
     
-    result.col_cbm = format_val(pl.get('col_cbm'))
+    result.col_cbm = format_val(pl.col_cbm)
     result.sources['col_cbm'] = pl_name
 
     # Pallet Strategy (Backfill)
-    if result.col_pallet_count == "N/A" and pl.get('col_pallet_count'):
-         result.col_pallet_count = format_val(pl['col_pallet_count'])
-         result.sheets['Invoice']['col_pallet_count'] = pl['col_pallet_count'] 
+    if result.col_pallet_count == "N/A" and pl.col_pallet_count:
+         result.col_pallet_count = format_val(pl.col_pallet_count)
+         inv_data.col_pallet_count = pl.col_pallet_count
          result.sources['col_pallet_count'] = pl_name # Update source to PL
 
     return result
 
-def parse_filename(file_path: Path, known_ids: Set[str] = None) -> dict:
-    """Parses filename to extract ID."""
+def extract_many(paths: Iterable[Path], mapping_dict: Optional[Mapping[str, str]] = None,
+                 max_workers: Optional[int] = None) -> Iterator[ExtractedInvoice]:
+    """
+    Runs excel_data_extractor over a batch of files in worker processes.
+    Files are independent and parsing is CPU-bound, so this scales with cores.
+    
+    Args:
+        paths: Excel files to extract
+        mapping_dict: Header alias -> col_id mapping, shared by all workers (loaded once if not given)
+        max_workers: Worker process limit (default: CPU count)
+    
+    Yields:
+        ExtractedInvoice per file, in input order. An extraction error is raised when its
+        file's result is reached, as in a serial loop.
+    """
+    paths = list(paths)
+    if mapping_dict is None:
+        mapping_dict = load_mapping_config()
+    extract = partial(excel_data_extractor, mapping_dict=mapping_dict)
+    
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        # Not worth starting a pool for a single file
+        yield from map(extract, paths)
+        return
+    
+    # chunksize=1: per-file cost varies a lot, and it dwarfs the per-task IPC
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(extract, paths, chunksize=1)
+
+def build_id_length_index(known_ids) -> Tuple[Tuple[int, frozenset], ...]:
+    """
+    Groups the known IDs by length, longest first: ((length, ids), ...).
+    There are only a few distinct ID lengths, so a filename is matched with one
+    set lookup per window of each length instead of one substring search per ID.
+    """
+    by_length = {}
+    for k_id in known_ids or ():
+        if k_id:
+            by_length.setdefault(len(k_id), set()).add(k_id)
+    return tuple((length, frozenset(by_length[length])) for length in sorted(by_length, reverse=True))
+
+def parse_filename(file_path: Path, id_index: Tuple[Tuple[int, frozenset], ...] = ()) -> FileRecord:
+    """
+    Parses filename to extract ID.
+    id_index comes from build_id_length_index (built once per folder in scan_invoice_files).
+    The longest known ID in the name wins (the leftmost one on a tie).
+    """
     original_name = file_path.name
     extracted_id = None
     
-    if known_ids:
-        sorted_ids = sorted(known_ids, key=len, reverse=True)
-        for k_id in sorted_ids:
-            if k_id in original_name:
-                extracted_id = k_id
-                break
+    if id_index:
+        extracted_id = _longest_known_id(original_name, id_index)
     
     if not extracted_id:
         # Regex Fallback - capture compound IDs like JLF-ISELLA26002 or simple IDs like MOTO26003E
         # Pattern: Optional(Letters-) + Letters + OptionalHyphen + Digits + OptionalTrailingLetters
-        candidates = re.findall(r'((?:[A-Z]+[-_])?[A-Z]+[-_]?\d+[A-Z]*)', original_name, re.IGNORECASE)
+        candidates = FILENAME_ID_RE.findall(original_name)
         valid_candidates = []
-        noise_prefixes = {'COPY', 'XLS', 'V', 'PART', 'REV', 'VAL', 'NUM', 'NO'}
         for c in candidates:
             upper_c = c.upper()
-            prefix_match = re.match(r'^([A-Z]+)', upper_c)
-            if prefix_match:
-                if prefix_match.group(1) in noise_prefixes: continue
+            # Leading A-Z run, by slicing rather than a second regex
+            prefix = upper_c[:len(upper_c) - len(upper_c.lstrip(string.ascii_uppercase))]
+            if prefix in NOISE_ID_PREFIXES: continue
             valid_candidates.append(upper_c)
         
         if valid_candidates:
             extracted_id = max(valid_candidates, key=len)
 
-    return {
-        'original_path': file_path,
-        'extracted_id': extracted_id,
-        'original_name': original_name
-    }
+    return FileRecord(
+        original_path=file_path,
+        extracted_id=extracted_id,
+        original_name=original_name
+    )
+
+def _longest_known_id(name: str, id_index) -> Optional[str]:
+    """Slides a window of each ID length over name, longest first; first window in the set wins."""
+    for length, ids in id_index:
+        for start in range(len(name) - length + 1):
+            window = name[start:start + length]
+            if window in ids:
+                return window
+    return None
 
-def scan_invoice_files(target_folder: Path) -> List[Dict]:
+def scan_invoice_files(target_folder: Path, known_ids: Optional[Set[str]] = None) -> List[FileRecord]:
     """Scans folder for Invoice files."""
     scanned = []
-    all_files = list(target_folder.glob("*.xlsx")) + list(target_folder.glob("*.xls"))
+    # Index the IDs once for the whole folder instead of once per file
+    id_index = build_id_length_index(known_ids)
     
-    for f in all_files:
-        if "master" in f.name.lower(): continue
-        if f.name.startswith("~$"): continue
-        if f.name in ["manual_review_needed.csv", "final_invoice_data.json", "rejection_report.csv", "missing_invoices.csv", "verification_report.xlsx", "verification_report.csv"]: continue
+    for f in list_excel_files(target_folder):
+        name = f.name
+        if name in EXCLUDED_FILE_NAMES or name.startswith("~$") or "master" in name.lower(): continue
         
-        scanned.append(parse_filename(f))
+        scanned.append(parse_filename(f, id_index))
     return scanned
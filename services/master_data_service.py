@@ -1,15 +1,81 @@
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import Set, Dict, List, Optional, Tuple
 from core.models import VerificationStatus
+from core.regex_utils import NUMBER_RE, regex_extract_number
+from core.utils import read_master_table, write_master_table
 import re
 
+# Diffs Columns: target IS the key now (col_xxx)
+DIFF_COLS_MAP = {
+    'DIFF_PALLET': 'col_pallet_count', 
+    'DIFF_SQFT': 'col_qty_sf', 
+    'DIFF_AMOUNT': 'col_amount',
+    'DIFF_PCS': 'col_qty_pcs', 
+    'DIFF_NET': 'col_net', 
+    'DIFF_GROSS': 'col_gross', 
+    'DIFF_CBM': 'col_cbm'
+}
+_DIFF_COL_BY_KEY = {key: d_col for d_col, key in DIFF_COLS_MAP.items()}
+
+# Check List (Standardized Keys), and the sheets each is checked on
+VERIFY_CHECKS = (
+    'col_qty_sf', 'col_amount', 'col_pallet_count',
+    'col_qty_pcs', 'col_net', 'col_gross', 'col_cbm'
+)
+VERIFY_SHEETS = ('Invoice', 'PackingList', 'Contract')
+
+
+def _report_name(key: str) -> str:
+    """Returns the short name of a col_* key used in the verification report table."""
+    # Name formatting: col_qty_sf -> Qty SF
+    name = key.replace('col_', '').replace('_', ' ').title()
+    name = name.replace('Qty Sf', 'Qty SF').replace('Qty Pcs', 'Qty PCS').replace('Cbm', 'CBM')
+    # Shorten for table
+    name = name.replace('Weight', 'Wgt').replace('Pallet Count', 'Pallets')
+    return name
+
+_REPORT_NAMES = {key: _report_name(key) for key in VERIFY_CHECKS}
+
+
+def _get_num(v):
+    """Returns None for empty/NaN values, float otherwise (first number found in text)."""
+    try:
+        if v is None or (isinstance(v, str) and v.strip() == ''):
+            return None
+        if isinstance(v, float) and (v != v):  # NaN check: NaN != NaN
+            return None
+        if isinstance(v, (int, float)): 
+            return float(v)
+        return regex_extract_number(str(v), default=None)
+    except: 
+        return None
+
+def clean_numeric_series(s: pd.Series) -> pd.Series:
+    """
+    _get_num over a whole column at once: float64, NaN where _get_num gives None.
+    Numeric and all-text columns are converted in one vectorized pass; mixed
+    object columns fall back to _get_num per cell.
+    """
+    if pd.api.types.is_numeric_dtype(s):  # includes bool and nullable ints
+        return s.astype('float64')
+    
+    kind = pd.api.types.infer_dtype(s, skipna=True)
+    if kind == 'empty':
+        return pd.Series(np.nan, index=s.index, dtype='float64')
+    if kind == 'string':
+        return s.str.extract(NUMBER_RE.pattern, expand=False).astype('float64')
+    return s.map(_get_num).astype('float64')
+
 class MasterDataService:
     def __init__(self, master_path: Path):
         self.master_path = master_path
         self.df = None
         self.col_map = {}
+        self.reverse_col_map = {}
+        self.verify_col = None
         
     def load(self) -> bool:
         """Loads the Master List into memory."""
@@ -18,10 +84,7 @@ class MasterDataService:
             return False
             
         try:
-            if self.master_path.suffix.lower() == '.csv':
-                self.df = pd.read_csv(self.master_path)
-            else:
-                self.df = pd.read_excel(self.master_path)
+            self.df = read_master_table(self.master_path)
             self._map_columns()
             return True
         except Exception as e:
@@ -32,8 +95,9 @@ class MasterDataService:
         """Identifies standard columns in the loaded DF using mapping_config.json."""
         if self.df is None: return
         self.col_map = {}
+        self.verify_col = None
         
-        from core.config import load_mapping_config
+        from core.config import load_mapping_config, normalize_header
         mapping_dict = load_mapping_config()
         
         # Known col_ids for direct column name matching
@@ -43,9 +107,14 @@ class MasterDataService:
         for c in self.df.columns:
             cl = c.lower().strip()
             
+            # Verify State column (first match wins); not a col_id, so kept out of col_map
+            if self.verify_col is None and ('verify state' in cl or 'verified' in cl):
+                self.verify_col = c
+            
             # 1. Config Match (from mapping_config.json)
-            if cl in mapping_dict:
-                col_id = mapping_dict[cl]
+            header_key = normalize_header(c)
+            if header_key in mapping_dict:
+                col_id = mapping_dict[header_key]
                 
                 # Special Case: ID
                 if col_id == 'col_inv_no':
@@ -61,6 +130,9 @@ class MasterDataService:
             elif ('invoice' in cl or 'id' in cl) and 'diff' not in cl and 'verify' not in cl:
                  if 'invoice_id' not in self.col_map:
                      self.col_map['invoice_id'] = c
+        
+        # Original header -> col_id, used to rename columns for the UI
+        self.reverse_col_map = {v: k for k, v in self.col_map.items()}
 
     def get_known_ids(self) -> Tuple[Set[str], Set[str]]:
         """Returns (all_ids, verified_ids)."""
@@ -73,18 +145,18 @@ class MasterDataService:
         id_col = self.col_map.get('invoice_id')
         if not id_col: return set(), set()
         
-        ids = set(self.df[id_col].dropna().astype(str).str.strip().unique())
+        # Normalize the ID column once; both sets are drawn from it
+        ids_series = self.df[id_col].dropna().astype(str).str.strip()
+        ids = set(ids_series.unique())
         
-        # Check Verify State
-        verify_col = None
-        for c in self.df.columns:
-            if 'verify state' in c.lower() or 'verified' in c.lower():
-                verify_col = c
-                break
-                
+        # Check Verify State (column resolved in _map_columns)
+        verify_col = self.verify_col
         if verify_col:
-            v_mask = self.df[verify_col].astype(str).str.lower() == 'true'
-            verified_ids = set(self.df[v_mask][id_col].dropna().astype(str).str.strip().unique())
+            # Stringify only the distinct states (True, 'TRUE', 'true', ...), not every row
+            states = self.df[verify_col]
+            truthy = [v for v in states.unique() if str(v).lower() == 'true']
+            v_mask = states.isin(truthy).reindex(ids_series.index, fill_value=False)
+            verified_ids = set(ids_series[v_mask].unique())
             
         return ids, verified_ids
 
@@ -97,135 +169,95 @@ class MasterDataService:
         id_col = self.col_map.get('invoice_id')
         if not id_col: return
         
-        # Index master rows by ID (keep all rows, not just first match)
-        master_by_id = {}
-        for index, row in self.df.iterrows():
-            m_id = str(row.get(id_col)).strip()
-            if m_id not in master_by_id:
-                master_by_id[m_id] = []
-            master_by_id[m_id].append((index, row))
+        # Position of the first master row for each ID (only the first match is compared).
+        # Vectorized: no per-row Series objects as with iterrows()
+        master_ids = self.df[id_col].astype(str).str.strip()
+        is_first = ~master_ids.duplicated()
+        master_pos_by_id = dict(zip(master_ids[is_first], np.flatnonzero(is_first.to_numpy())))
+        
+        # No extracted invoice is in the master: nothing to compare or write back
+        item_ids = [item.get('invoice_id') for item in extracted_data]
+        if not any(inv_id and str(inv_id).strip() in master_pos_by_id for inv_id in item_ids):
+            for item, inv_id in zip(extracted_data, item_ids):
+                if inv_id: item['status'] = 'Missing from Master'
+            return
             
-        # Diffs Columns: target IS the key now (col_xxx)
-        diff_cols_map = {
-            'DIFF_PALLET': 'col_pallet_count', 
-            'DIFF_SQFT': 'col_qty_sf', 
-            'DIFF_AMOUNT': 'col_amount',
-            'DIFF_PCS': 'col_qty_pcs', 
-            'DIFF_NET': 'col_net', 
-            'DIFF_GROSS': 'col_gross', 
-            'DIFF_CBM': 'col_cbm'
-        }
-
-        for col in ['VERIFY STATE'] + list(diff_cols_map.keys()):
+        for col in ['VERIFY STATE', *DIFF_COLS_MAP]:
             if col not in self.df.columns: self.df[col] = None
+        if self.verify_col is None: self.verify_col = 'VERIFY STATE'
+        
+        # Master columns cleaned to numbers once (None where empty), read by row position
+        master_values = {}
+        for col in {c for key, c in self.col_map.items() if key != 'invoice_id'}:
+            nums = clean_numeric_series(self.df[col])
+            master_values[col] = nums.astype(object).where(nums.notna(), None).tolist()
+        
+        # Results per master row position, written back one column at a time after the loop
+        # (a later item with the same ID overwrites an earlier one, as before)
+        state_updates = {}
+        diff_updates = {d_col: {} for d_col in DIFF_COLS_MAP}
+        
+        # Per-key plan for this master: (key, cleaned master column values or None, DIFF_* column,
+        # short name for the report table)
+        check_plan = []
+        for key in VERIFY_CHECKS:
+            master_col = self.col_map.get(key)
+            master_nums = master_values[master_col] if master_col else None
+            check_plan.append((key, master_nums, _DIFF_COL_BY_KEY.get(key), _REPORT_NAMES[key]))
         
         # Iterate over EACH extracted item (not master rows)
         for item in extracted_data:
             inv_id = item.get('invoice_id')
             if not inv_id: continue
             
-            # Find matching master row
-            master_rows = master_by_id.get(str(inv_id).strip(), [])
-            if not master_rows:
+            # Find matching master row (first one for this ID)
+            master_pos = master_pos_by_id.get(str(inv_id).strip())
+            if master_pos is None:
                 item['status'] = 'Missing from Master'
                 continue
             
-            # Use first matching master row for comparison
-            master_index, master_row = master_rows[0]
-            
             all_match = True
             diffs = {}
             
-            # Helper - returns None for empty/NaN values, float otherwise
-            def get_num(v):
-                try:
-                    if v is None or (isinstance(v, str) and v.strip() == ''):
-                        return None
-                    if isinstance(v, float) and (v != v):  # NaN check: NaN != NaN
-                        return None
-                    if isinstance(v, (int, float)): 
-                        return float(v)
-                    # Use regex_utils for string extraction
-                    from core.regex_utils import regex_extract_number
-                    result = regex_extract_number(str(v), default=None)
-                    return result
-                except: 
-                    return None
-
-            
-            # Check List (Standardized Keys)
-            checks = [
-                'col_qty_sf', 'col_amount', 'col_pallet_count',
-                'col_qty_pcs', 'col_net', 'col_gross', 'col_cbm'
-            ]
-            
-            failures_by_sheet = {}
-            
             # Get sheets data for per-sheet verification
             sheets_data = item.get('sheets', {})
-            sheet_names = ['Invoice', 'PackingList', 'Contract']
-            all_partition_details = []
             
-            for key in checks:
-                master_col = self.col_map.get(key)
-                if not master_col: continue
+            # Each sheet's values as numbers, converted once: {sheet: {key: number or None}}
+            # (keys the sheet doesn't have are left out)
+            sheet_nums = {}
+            for sheet_name in VERIFY_SHEETS:
+                sheet_values = sheets_data.get(sheet_name, {})
+                sheet_nums[sheet_name] = {key: _get_num(sheet_values[key]) for key in VERIFY_CHECKS if key in sheet_values}
+            
+            for key, master_nums, diff_col, _ in check_plan:
+                if master_nums is None: continue
                 
-                master_value = get_num(master_row.get(master_col))
+                master_value = master_nums[master_pos]
                 master_has_no_data = master_value is None
                 
-                # Check EACH sheet's value for this key against Master
-                for sheet_name in sheet_names:
-                    sheet_values = sheets_data.get(sheet_name, {})
-                    
+                # Check EACH sheet's value for this key against Master.
+                # Only the verdict is kept (the per-sheet values are shown in the report table
+                # below), so the remaining sheets are skipped once the item has failed.
+                for sheet_name in (VERIFY_SHEETS if all_match else ()):
                     # STRICT: Always check if the sheet has this value (removed target_inspect_col gate)
-                    if key not in sheet_values:
-                        continue  # This sheet doesn't have this field value
-                    
-                    sheet_value = get_num(sheet_values.get(key))
+                    # (a field the sheet doesn't have comes back as None)
+                    sheet_value = sheet_nums[sheet_name].get(key)
                     if sheet_value is None or sheet_value == 0.0:
                         continue  # No meaningful value from sheet
                     
-                    readable_key = key.replace('col_', '').replace('_', ' ').upper()
-                    
-                    # Get source file info for this item
-                    # Use simple sheet name for cleaner display
-                    sheet_source = sheet_name
-                    
                     if master_has_no_data:
                         # Master has no value - if sheet has significant value, flag mismatch
-                        if sheet_value > 1.0:
-                            all_match = False
-                            msg = f"{readable_key} Fail ({sheet_value} vs Master N/A)"
-                            if sheet_source not in failures_by_sheet:
-                                failures_by_sheet[sheet_source] = []
-                            failures_by_sheet[sheet_source].append(msg)
+                        mismatch = sheet_value > 1.0
                     else:
-                        diff = sheet_value - master_value
-                        
-                        if abs(diff) > 0.01:
-                            all_match = False
-                            msg = f"{readable_key} Fail ({sheet_value} vs Master {master_value})"
-                            if sheet_source not in failures_by_sheet:
-                                failures_by_sheet[sheet_source] = []
-                            failures_by_sheet[sheet_source].append(msg)
-                
-                # Report Partition Details (New Feature)
-                partition_entries = []
-                for s_name in sheet_names:
-                    s_vals = sheets_data.get(s_name, {})
-                    if key in s_vals:
-                         val = get_num(s_vals[key])
-                         if val is not None:
-                             partition_entries.append(f"{s_name}={val}")
-                
-                if partition_entries:
-                    partition_str = f"{key}: {', '.join(partition_entries)}"
-                    # Append later to detection_summary
-                    all_partition_details.append(partition_str)
+                        mismatch = abs(sheet_value - master_value) > 0.01
+                    
+                    if mismatch:
+                        all_match = False
+                        break
 
                 # Calculate diff using first sheet's value for master DF update
                 # (Per-sheet check already validates, this is just for DIFF_* column display)
-                extracted_value = get_num(item.get(key))
+                extracted_value = _get_num(item.get(key))
                 if master_has_no_data:
                     diff = extracted_value if extracted_value is not None else 0.0
                 else:
@@ -235,10 +267,8 @@ class MasterDataService:
                 diff = round(diff, 7)
                     
                 # Save diff to item
-                for d_col, d_target_key in diff_cols_map.items():
-                    if d_target_key == key:
-
-                        diffs[d_col] = diff
+                if diff_col:
+                    diffs[diff_col] = diff
             
             # --- NEW REPORT BUILDER (Sheet-Centric) ---
             report_lines = []
@@ -246,7 +276,7 @@ class MasterDataService:
             # report_lines.append(f"Source: {source_file}") # UI has file name, maybe redundant? keep for copy-paste.
             
             # 1. Iterate Sheets
-            for i, sheet_name in enumerate(sheet_names, 1):
+            for i, sheet_name in enumerate(VERIFY_SHEETS, 1):
                 sheet_data = sheets_data.get(sheet_name, {})
                 
                 # Header: "1. INVOICE (Row 20)"
@@ -268,17 +298,16 @@ class MasterDataService:
                 
                 # Table Rows
                 any_rows = False
-                for key in checks:
+                for key, master_nums, _, name in check_plan:
                     # Check if this sheet has this key AND it has a value
                     # STRICT: We only report if the sheet actually extracted something for this column
-                    val = get_num(sheet_data.get(key))
+                    val = sheet_nums[sheet_name].get(key)
                     if val is None: continue
                     
                     any_rows = True
                     
                     # Get Master Val
-                    master_col = self.col_map.get(key)
-                    m_val = get_num(master_row.get(master_col)) if master_col else None
+                    m_val = master_nums[master_pos] if master_nums is not None else None
                     
                     # Calc Diff & formatting
                     diff_str = "N/A"
@@ -290,12 +319,6 @@ class MasterDataService:
                     m_str = str(m_val) if m_val is not None else "-"
                     v_str = str(val)
                     
-                    # Name formatting: col_qty_sf -> Qty SF
-                    name = key.replace('col_', '').replace('_', ' ').title()
-                    name = name.replace('Qty Sf', 'Qty SF').replace('Qty Pcs', 'Qty PCS').replace('Cbm', 'CBM')
-                    # Shorten for table
-                    name = name.replace('Weight', 'Wgt').replace('Pallet Count', 'Pallets')
-                    
                     report_lines.append(f"{name:<10} {v_str:<10} {m_str:<10} {diff_str:<10}")
 
                 if not any_rows:
@@ -308,8 +331,8 @@ class MasterDataService:
             # We need to be careful to extract them specifically from PL, 
             # extracted_value in item is aggregated (likely from PL but not guaranteed if we had multi-source)
             # Safe to take from item or PL sheet. PL sheet is explicit.
-            net = get_num(pl_data.get('col_net'))
-            gross = get_num(pl_data.get('col_gross'))
+            net = _get_num(pl_data.get('col_net'))
+            gross = _get_num(pl_data.get('col_gross'))
 
             if net is not None and gross is not None:
                 if net > gross:
@@ -327,15 +350,17 @@ class MasterDataService:
             item['status'] = 'Verified' if all_match else 'Mismatch'
             
             # Update master DF (optional - updates first matching row)
-            self.df.at[master_index, 'VERIFY STATE'] = all_match
+            state_updates[master_pos] = all_match
             for k, v in diffs.items():
-                self.df.at[master_index, k] = v
+                diff_updates[k][master_pos] = v
+        
+        # Write results back: one positional assignment per column instead of one .at per cell
+        for col, updates in [('VERIFY STATE', state_updates), *diff_updates.items()]:
+            if updates:
+                self.df.iloc[list(updates), self.df.columns.get_loc(col)] = list(updates.values())
                 
         # Save
-        if self.master_path.suffix.lower() == '.csv':
-            self.df.to_csv(self.master_path, index=False)
-        else:
-            self.df.to_excel(self.master_path, index=False)
+        write_master_table(self.df, self.master_path)
 
     def parse_paste_data(self, clipboard_text: str) -> Tuple[List[List[str]], Dict[int, str], bool]:
         """
@@ -349,7 +374,7 @@ class MasterDataService:
         if not rows: return [], {}, False
         
         # Load Config
-        from core.config import load_mapping_config
+        from core.config import load_mapping_config, normalize_header
         mapping_dict = load_mapping_config()
         
         # Check against Master Columns
@@ -366,8 +391,9 @@ class MasterDataService:
             target_column = None
             
             # 1. Config Match (Prioritize col_id)
-            if header_candidate_lower in mapping_dict:
-                col_id = mapping_dict[header_candidate_lower]
+            header_key = normalize_header(header_candidate)
+            if header_key in mapping_dict:
+                col_id = mapping_dict[header_key]
                 target_column = col_id 
                 match_count += 1
             
@@ -417,6 +443,21 @@ class MasterDataService:
                      
         start_idx = 1 if is_header else 0
         
+        # ID -> row lookup built once (first row per ID), instead of a full-column
+        # string compare per pasted row. Entries are a master row position or a
+        # pending appended row (index into new_rows), so a later pasted row with
+        # the same ID updates the row appended for it.
+        row_by_key = {}
+        if merge_col_name:
+            keys = self.df[merge_col_name].astype(str).str.strip()
+            is_first = ~keys.duplicated()
+            row_by_key = {k: ('master', pos) for k, pos in zip(keys[is_first], np.flatnonzero(is_first.to_numpy()))}
+        
+        # Collected changes, written back once per column after the loop
+        updates = {}  # column -> {row position: value}
+        new_rows = []
+        numeric_cols = {c for c in self.df.columns if pd.api.types.is_numeric_dtype(self.df[c])}
+        
         for i in range(start_idx, len(rows)):
             row_data = rows[i]
             
@@ -429,34 +470,45 @@ class MasterDataService:
             if not new_data: continue
             
             # Merge or Append
-            matched = False
+            target = None
             if merge_col_name and merge_col_name in new_data:
-                # Try to find match
-                key_val = str(new_data[merge_col_name]).strip()
-                # Find index
-                # This is slow for large DF, but acceptable for GUI paste
-                matches = self.df[self.df[merge_col_name].astype(str).str.strip() == key_val].index
-                if not matches.empty:
-                    idx = matches[0]
-                    # Update
-                    for k, v in new_data.items():
-                        self.df.at[idx, k] = v
-                    matched = True
+                target = row_by_key.get(str(new_data[merge_col_name]).strip())
             
-            if not matched:
+            if target is not None:
+                # Update
+                kind, pos = target
+                if kind == 'new':
+                    new_rows[pos].update(new_data)
+                else:
+                    for k, v in new_data.items():
+                        updates.setdefault(k, {})[pos] = v
+            else:
                 # Append
-                # We need to ensure we use loc with new index
-                new_idx = self.df.index.max() + 1 if not self.df.empty else 0
-                # Assign per column to avoid NaN issues
-                # Assign per column to avoid NaN issues
+                # Attempt to convert to numeric if column is numeric
                 for k, v in new_data.items():
-                    # Attempt to convert to numeric if column is numeric
-                    if k in self.df.columns and pd.api.types.is_numeric_dtype(self.df[k]):
+                    if k in numeric_cols:
                         try:
-                            v = float(v)
+                            new_data[k] = float(v)
                         except:
                             pass
-                    self.df.at[new_idx, k] = v
+                new_rows.append(new_data)
+                if merge_col_name and merge_col_name in new_data:
+                    row_by_key.setdefault(str(new_data[merge_col_name]).strip(), ('new', len(new_rows) - 1))
+        
+        # Updates: pasted text goes into numeric columns too, so those are widened to object first
+        for col, by_pos in updates.items():
+            if col not in self.df.columns:
+                self.df[col] = None
+            values = self.df[col].to_numpy(dtype=object, copy=True)
+            values[list(by_pos)] = list(by_pos.values())
+            self.df[col] = pd.Series(values, index=self.df.index, dtype=object)
+        
+        # Appends: one concat, continuing the index after the current last row
+        if new_rows:
+            start = self.df.index.max() + 1 if not self.df.empty else 0
+            appended = pd.DataFrame(new_rows, index=range(start, start + len(new_rows)))
+            # Concat even onto an empty master, so its unmapped columns (and their order) stay
+            self.df = pd.concat([self.df, appended])
         
         # Auto-save? Or let user click save?
         # Service should probably separate state from persistence, but for now we update memory.
@@ -3,11 +3,17 @@ import json
 import csv
 from pathlib import Path
 from typing import List, Optional
-from core.config import REPORTS_DIR
+from core.config import REPORTS_DIR, load_mapping_config
 from core.models import ExtractedInvoice, VerificationStatus
-from services.extraction_service import scan_invoice_files, excel_data_extractor
+from services.extraction_service import scan_invoice_files, extract_many
 from services.master_data_service import MasterDataService
 
+try:
+    import orjson
+except ImportError:
+    # orjson not installed, fall back to stdlib json
+    orjson = None
+
 class PipelineService:
     def __init__(self, folder_path: str, master_path: Optional[str] = None):
         self.folder_path = Path(folder_path)
@@ -37,9 +43,9 @@ class PipelineService:
         # For simplicity in this Service, we assume it's passed in. 
         # The UI should handle auto-detection.
 
-        # 3. Scan Files
+        # 3. Scan Files (names are matched against the master IDs before the regex fallback)
         print("Scanning files...")
-        scanned_files = scan_invoice_files(self.folder_path)
+        scanned_files = scan_invoice_files(self.folder_path, master_ids)
         
         # 4. Reconcile (Identify valid vs rejected)
         matched = []
@@ -49,7 +55,7 @@ class PipelineService:
         found_master_ids = set()
         
         for file_dat in scanned_files:
-            ext_id = file_dat.get('extracted_id')
+            ext_id = file_dat.extracted_id
             if not ext_id:
                 failed_parse.append(file_dat)
                 continue
@@ -70,25 +76,29 @@ class PipelineService:
         # 5. Generate Reports (Rejection/Missing)
         self._generate_rejection_report(rejected, failed_parse, list(missing_ids))
         
-        # 6. Extract Data
+        # 6. Extract Data (files in parallel; mapping config loaded once for the whole batch)
+        mapping_dict = load_mapping_config()
+        print(f"Extracting {len(matched)} file(s)...")
+        paths = [file_dat.original_path for file_dat in matched]
         final_results = []
-        for file_dat in matched:
-            path = file_dat['original_path']
-            print(f"Extracting: {path.name}...")
-            
-            data_obj = excel_data_extractor(path)
+        for file_dat, data_obj in zip(matched, extract_many(paths, mapping_dict)):
+            print(f"Extracted: {file_dat.original_path.name}")
             
             # Enforce ID
-            known_id = file_dat.get('extracted_id')
+            known_id = file_dat.extracted_id
             if known_id: data_obj.invoice_id = known_id
             
             final_results.append(data_obj.to_dict())
-            
+        
         # 7. Write Final JSON
         output_json = self.reports_dir / "final_invoice_data.json"
         try:
-            with open(output_json, 'w', encoding='utf-8') as f:
-                json.dump(final_results, f, indent=4)
+            if orjson is None:
+                with open(output_json, 'w', encoding='utf-8') as f:
+                    json.dump(final_results, f, indent=4)
+            else:
+                with open(output_json, 'wb') as f:
+                    f.write(orjson.dumps(final_results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
         except Exception as e:
             print(f"Error saving JSON: {e}")
             
@@ -108,23 +118,20 @@ class PipelineService:
             p = self.reports_dir / "missing_invoices.csv"
             try:
                 with open(p, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=['Missing Invoice ID'])
-                    writer.writeheader()
-                    for m in missing: writer.writerow({'Missing Invoice ID': m})
+                    writer = csv.writer(f)
+                    writer.writerow(('Missing Invoice ID',))
+                    writer.writerows((m,) for m in missing)
             except Exception: pass
             
-        # Rejected/Failed
-        rows = []
-        for item in rejected:
-            rows.append({'Filename': item['original_name'], 'ID': item['extracted_id'], 'Status': 'Unknown ID'})
-        for item in failed:
-            rows.append({'Filename': item['original_name'], 'ID': 'N/A', 'Status': 'Parse Error'})
+        # Rejected/Failed (plain tuples; column order matches the header row)
+        rows = [(item.original_name, item.extracted_id, 'Unknown ID') for item in rejected]
+        rows += [(item.original_name, 'N/A', 'Parse Error') for item in failed]
             
         if rows:
             p = self.reports_dir / "rejection_report.csv"
             try:
                 with open(p, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=['Filename', 'ID', 'Status'])
-                    writer.writeheader()
+                    writer = csv.writer(f)
+                    writer.writerow(('Filename', 'ID', 'Status'))
                     writer.writerows(rows)
             except Exception: pass
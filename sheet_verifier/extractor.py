@@ -1,11 +1,12 @@
 import re
-import json
-from pathlib import Path
-import openpyxl
-from openpyxl.worksheet.worksheet import Worksheet
-from typing import Dict, Any, Optional, Set
+from typing import Dict, Any, Mapping, Optional, Set
 from core.regex_utils import regex_extract_number, regex_extract
 from core.exceptions import DataExtractionError, ErrorCode, ParsingError
+from core.config import load_mapping_config, normalize_header
+from core.sheet_grid import SheetGrid
+
+# "Invoice No: XYZ" style label, group 1 is the text after it
+ID_LABEL_RE = re.compile(r'(?:invoice\s*no|ref\s*no|inv\s*id)\s*[:.]?\s*(.+)', re.IGNORECASE)
 
 # Inspectable column types (verification-critical numeric fields)
 INSPECTABLE_COLS = {
@@ -25,10 +26,11 @@ class SheetExtractor:
         # Load header mappings from config
         self.header_mappings = self._load_header_mappings()
 
-    def extract_sheet_data(self, sheet: Worksheet, sheet_type: str = "generic") -> Dict[str, Any]:
+    def extract_sheet_data(self, sheet: SheetGrid, sheet_type: str = "generic") -> Dict[str, Any]:
         """
         Extracts Amount, Quantity, Pallets, and Invoice ID from a given sheet.
         Also populates target_inspect_col with detected inspectable columns.
+        The sheet is a SheetGrid snapshot (plain values, no Cell objects).
         """
         data = {
             'row_found': -1,
@@ -42,30 +44,38 @@ class SheetExtractor:
         # 1. First Pass: Scan rows and collect header matches per row
         # We need 3+ header matches on the same row to confirm it as the header row
         data_row_idx = -1
+        total_row = ()
         row_header_matches = {}  # row_idx -> list of (col_idx, col_id) tuples
         
-        for row in sheet.iter_rows(max_row=150): 
-            for cell in row:
-                if not cell.value: continue
-                val_str = str(cell.value).strip()
+        for row_idx, row in enumerate(sheet.rows[:150], start=1):
+            for col_idx, value in enumerate(row, start=1):
+                if not value: continue
+                val_str = str(value).strip()
+                val_lower = val_str.lower()
+                
+                # Plain substring tests first: most cells contain neither word,
+                # so the regexes only run on the few candidate cells
                 
                 # Check 1: Total Row (for Amt/Qty/Pallets)
-                if data_row_idx == -1 and self.patterns['total_row'].search(val_str):
-                    data_row_idx = cell.row
+                if data_row_idx == -1 and 'total' in val_lower and self.patterns['total_row'].search(val_str):
+                    data_row_idx = row_idx
+                    total_row = row
                 
                 # Check 2: Invoice ID (Header)
-                if not data.get('invoice_id') and self.patterns['invoice_id'].search(val_str):
-                    found_id = self._extract_id_value(sheet, cell)
+                if (not data.get('invoice_id') and ('no' in val_lower or 'nv' in val_lower)
+                        and self.patterns['invoice_id'].search(val_str)):
+                    found_id = self._extract_id_value(sheet, row_idx, col_idx, value)
                     if found_id:
                         data['invoice_id'] = found_id
                 
                 # Check 3: Collect header matches per row
-                # We use lower() to match against normalized keys in header_mappings
-                if val_str.lower() in self.header_mappings:
-                    col_id = self.header_mappings[val_str.lower()]
-                    if cell.row not in row_header_matches:
-                        row_header_matches[cell.row] = []
-                    row_header_matches[cell.row].append((cell.column, col_id))
+                # Text cells are normalized like the keys in header_mappings
+                header_key = normalize_header(val_str) if isinstance(value, str) else None
+                if header_key in self.header_mappings:
+                    col_id = self.header_mappings[header_key]
+                    if row_idx not in row_header_matches:
+                        row_header_matches[row_idx] = []
+                    row_header_matches[row_idx].append((col_idx, col_id))
         
         # 2. Find the header row (row with MOST header matches, minimum 3)
         header_row_idx = -1
@@ -104,7 +114,9 @@ class SheetExtractor:
             return data
         
         data['row_found'] = data_row_idx
-        row_cells = sheet[data_row_idx]
+        # (column, value) across the full sheet width, from the row tuple kept during the scan
+        padded_row = total_row + (None,) * (sheet.max_column - len(total_row))
+        row_cells = list(enumerate(padded_row, start=1))
 
         
         # 2. Extract Data from that row
@@ -114,9 +126,7 @@ class SheetExtractor:
         
         formula_cells = []
         
-        for cell in row_cells:
-            val = cell.value
-            
+        for col_idx, val in row_cells:
             # Pallet Check (Text) - also detect via footer pattern
             if isinstance(val, str) and 'pallet' in val.lower():
                 extracted_pal = self._extract_pallet_number(val)
@@ -130,7 +140,7 @@ class SheetExtractor:
             is_number = isinstance(val, (int, float))
             
             if is_formula or is_number:
-                formula_cells.append(cell)
+                formula_cells.append((col_idx, val))
 
         # 3. Extract Values for ALL detected columns
         # We iterate over the best header matches to map col_idx to col_id
@@ -140,10 +150,9 @@ class SheetExtractor:
         # Also auto-add pallet counts if found via text patterns (handled above in extraction but need to ensure value)
         # Re-scan the row to pull values for these columns
         
-        for cell in row_cells:
-            if cell.column in col_id_map:
-                col_id = col_id_map[cell.column]
-                val = cell.value
+        for col_idx, val in row_cells:
+            if col_idx in col_id_map:
+                col_id = col_id_map[col_idx]
                 try:
                     clean_val = self._clean_number(val, context_col=col_id)
                     data['values'][col_id] = clean_val
@@ -201,7 +210,7 @@ class SheetExtractor:
     def _find_header_type(self, sheet, row_idx, col_idx) -> Optional[str]:
         # Search upwards
         for r in range(row_idx - 1, max(0, row_idx - 50), -1):
-            cell_val = sheet.cell(row=r, column=col_idx).value
+            cell_val = sheet.value(r, col_idx)
             if not cell_val: continue
             
             txt = str(cell_val).lower()
@@ -212,7 +221,7 @@ class SheetExtractor:
                 return 'amount'
         return None
 
-    def _extract_id_value(self, sheet, cell) -> Optional[str]:
+    def _extract_id_value(self, sheet, row_idx, col_idx, value) -> Optional[str]:
         """
         Extracts the ID string by searching the cell and its neighbors.
         Priority:
@@ -221,9 +230,9 @@ class SheetExtractor:
         3. Below Cell (Row + 1)
         4. Right-Below (Row + 1, Col + 1)
         """
-        val = str(cell.value)
+        val = str(value)
         # Remove label (Invoice No:, Ref No:, etc) using regex_extract
-        clean_val = regex_extract(val, r'(?:invoice\s*no|ref\s*no|inv\s*id)\s*[:.]?\s*(.+)', group=1, default='')
+        clean_val = regex_extract(val, ID_LABEL_RE, group=1, default='')
         if not clean_val:
             # No match - try to use the whole value if it doesn't look like a label
             clean_val = val.strip()
@@ -243,8 +252,7 @@ class SheetExtractor:
         
         for r_off, c_off in neighbors:
             try:
-                target_cell = sheet.cell(row=cell.row + r_off, column=cell.column + c_off)
-                val = target_cell.value
+                val = sheet.value(row_idx + r_off, col_idx + c_off)
                 if val:
                     s_val = str(val).strip()
                     if s_val:
@@ -254,32 +262,9 @@ class SheetExtractor:
             
         return None
 
-    def _load_header_mappings(self) -> Dict[str, str]:
+    def _load_header_mappings(self) -> Mapping[str, str]:
         """
-        Loads header text -> col_id mappings from mapping_config.json.
-        Combines header_text_mappings and shipping_list_header_map.
+        Returns header text -> col_id mappings from mapping_config.json.
+        Shares the mtime-keyed cache in core.config with the extraction service.
         """
-        config_path = Path("mapping_config.json")
-        if not config_path.exists():
-            return {}
-        
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            mappings = {}
-            
-            # Merge source 1: header_text_mappings
-            if 'header_text_mappings' in config:
-                for k, v in config['header_text_mappings'].get('mappings', {}).items():
-                    mappings[k.strip().lower()] = v
-            
-            # Merge source 2: shipping_list_header_map
-            if 'shipping_list_header_map' in config:
-                for k, v in config['shipping_list_header_map'].get('mappings', {}).items():
-                    mappings[k.strip().lower()] = v
-            
-            return mappings
-        except Exception as e:
-            print(f"Warning: Could not load header mappings: {e}")
-            return {}
+        return load_mapping_config()
@@ -1,4 +1,5 @@
 import argparse
+import re
 import sys
 from pathlib import Path
 
@@ -12,6 +13,10 @@ from sheet_verifier.verifier import InvoiceVerifier
 from sheet_verifier.reporter import generate_report
 from sheet_verifier.extractor import SheetExtractor # Used implicitly by verifier, but good to check import
 from core.regex_utils import regex_extract
+from core.utils import list_excel_files
+
+# Fallback ID pattern for file names (letters, optional separator, digits)
+FILENAME_ID_RE = re.compile(r'([A-Z]+[-_]?\d+)', re.IGNORECASE)
 
 def parse_filename_for_id(filename: str, master_ids: list) -> str:
     # 1. Check exact match
@@ -19,10 +24,8 @@ def parse_filename_for_id(filename: str, master_ids: list) -> str:
         if mid in filename:
             return mid
     
-    # 2. Simple regex fallback (optional)
     # 2. Simple regex fallback (optional) - using core utility
-    from core.regex_utils import regex_extract
-    result = regex_extract(filename, r'([A-Z]+[-_]?\d+)', group=1)
+    result = regex_extract(filename, FILENAME_ID_RE, group=1)
     if result:
         return result
         
@@ -53,10 +56,12 @@ def main():
         print(f"Folder not found: {folder}")
         return
         
-    files = list(folder.glob("*.xlsx")) + list(folder.glob("*.xls"))
+    files = list_excel_files(folder)
     print(f"Found {len(files)} Excel files in {folder}")
     
     results = []
+    # Master IDs in file order, built once rather than per invoice
+    master_ids = list(master_data)
     
     for f in files:
         if f.name.startswith("~"): continue # Skip temp files
@@ -65,7 +70,7 @@ def main():
         print(f"Verifying: {f.name}...")
         
         # Identify ID
-        inv_id = parse_filename_for_id(f.name, list(master_data.keys()))
+        inv_id = parse_filename_for_id(f.name, master_ids)
         
         if not inv_id:
             results.append({
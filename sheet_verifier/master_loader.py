@@ -1,7 +1,51 @@
-import pandas as pd
+import openpyxl
 from pathlib import Path
 from typing import Dict, Optional
 from core.regex_utils import regex_extract_number
+from core.utils import read_master_table
+
+# DIFF_* / VERIFY STATE columns that verify_and_update writes back into the master
+_DERIVED = ('diff', 'verify')
+
+# (key, required substrings, forbidden substrings, priority), one tuple per rule.
+# Within a group a column is claimed by its first matching rule; the groups are
+# independent, so e.g. "Qty PCS" can't be quantity but is still col_qty_pcs.
+_COLUMN_RULE_GROUPS = (
+    (
+        ('id', ('invoice',), _DERIVED, 2),
+        ('id', ('inv', 'id'), _DERIVED, 1),
+        ('pallets', ('pallet',), _DERIVED, 1),
+        ('amount', ('amount',), ('quantity', 'qty') + _DERIVED, 3),
+        ('amount', ('usd',), ('quantity', 'qty') + _DERIVED, 2),
+        ('amount', ('total',), ('quantity', 'qty') + _DERIVED, 1),
+        ('quantity', ('quantity',), ('pcs',) + _DERIVED, 2),
+        ('quantity', ('qty',), ('pcs',) + _DERIVED, 1),
+    ),
+    (
+        ('col_qty_pcs', ('pcs',), _DERIVED, 1),
+        ('col_qty_pcs', ('pieces',), _DERIVED, 1),
+        ('col_net', ('net', 'weight'), _DERIVED, 1),
+        ('col_gross', ('gross', 'weight'), _DERIVED, 1),
+        ('col_cbm', ('cbm',), _DERIVED, 1),
+    ),
+)
+
+def classify_master_columns(columns) -> Dict[str, str]:
+    """
+    Maps Master List headers to keys (id, amount, quantity, pallets, col_qty_pcs, ...)
+    with one pass over the columns and the rule table above.
+    Each key keeps its highest-priority column; on a tie the leftmost column wins.
+    """
+    best = {}
+    for c in columns:
+        cl = str(c).lower().strip()
+        for rules in _COLUMN_RULE_GROUPS:
+            for key, required, forbidden, priority in rules:
+                if all(s in cl for s in required) and not any(f in cl for f in forbidden):
+                    if key not in best or priority > best[key][0]:
+                        best[key] = (priority, c)
+                    break
+    return {key: c for key, (_, c) in best.items()}
 
 def load_master_list(file_path: Path) -> Dict[str, Dict[str, float]]:
     """
@@ -21,61 +65,82 @@ def load_master_list(file_path: Path) -> Dict[str, Dict[str, float]]:
         raise FileNotFoundError(f"Master list not found: {file_path}")
 
     try:
-        if file_path.suffix.lower() == '.csv':
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
+        header, rows, close = _open_master_rows(file_path)
     except Exception as e:
         print(f"Error reading master file: {e}")
         return {}
 
-    # Normalize columns to lower case key map
-    # We need to find: id, amount, quantity, pallets
-    col_map = {}
-    for c in df.columns:
-        cl = str(c).lower().strip()
-        if 'invoice' in cl or ('id' in cl and 'inv' in cl):
-            col_map['id'] = c
-        elif ('amount' in cl or 'total' in cl or 'usd' in cl) and 'quantity' not in cl:
-            col_map['amount'] = c
-        elif 'quantity' in cl or 'qty' in cl:
-            col_map['quantity'] = c
-        elif 'pallet' in cl:
-            col_map['pallets'] = c
+    try:
+        # Normalize columns to lower case key map
+        # We need to find: id, amount, quantity, pallets (+ pcs, weights, cbm)
+        col_map = classify_master_columns(header)
+
+        if 'id' not in col_map:
+            print(f"Error: Could not identify 'Invoice ID' column in {file_path.name}")
+            print(f"Available columns: {header}")
+            return {}
 
-    if 'id' not in col_map:
-        print(f"Error: Could not identify 'Invoice ID' column in {file_path.name}")
-        print(f"Available columns: {list(df.columns)}")
+        # Position of each mapped column in the row tuples (first header with that name)
+        col_pos = {key: header.index(c) for key, c in col_map.items()}
+        return _fold_master_rows(rows, col_pos)
+    except Exception as e:
+        print(f"Error reading master file: {e}")
         return {}
+    finally:
+        close()
+
+def _open_master_rows(file_path: Path):
+    """
+    Returns (header, row iterator, close callback) for the Master List.
     
-    # Map additional columns
-    for c in df.columns:
-        cl = str(c).lower().strip()
-        if 'pcs' in cl or 'pieces' in cl:
-            col_map['col_qty_pcs'] = c
-        elif 'net' in cl and 'weight' in cl:
-            col_map['col_net'] = c
-        elif 'gross' in cl and 'weight' in cl:
-            col_map['col_gross'] = c
-        elif 'cbm' in cl:
-            col_map['col_cbm'] = c
+    Excel files are streamed from a read-only workbook as plain value tuples,
+    so no DataFrame is built just to walk a few columns once. CSV goes through
+    read_master_table as before (pandas type inference), with NaN turned into None.
+    """
+    if file_path.suffix.lower() == '.csv':
+        df = read_master_table(file_path)
+        rows = df.to_numpy(dtype=object, na_value=None).tolist()
+        return list(df.columns), iter(rows), lambda: None
+
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        # First sheet, like pd.read_excel's default sheet_name=0
+        ws = wb.worksheets[0]
+        # Ignore the stored <dimension> (can be stale and cut rows/columns short)
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+        # Header is the first non-blank row (read_excel skips leading blank lines too)
+        header = next((list(row) for row in rows if any(v is not None and v != '' for v in row)), [])
+    except Exception:
+        wb.close()
+        raise
+    return header, rows, wb.close
 
+def _fold_master_rows(rows, col_pos: Dict[str, int]) -> Dict[str, Dict[str, float]]:
+    """Builds {invoice_id: expected values} from the data rows in a single pass."""
     master_data = {}
+    id_pos = col_pos['id']
     
-    for _, row in df.iterrows():
+    for row in rows:
         # Get ID
-        raw_id = row.get(col_map['id'])
-        if pd.isna(raw_id):
+        raw_id = row[id_pos] if id_pos < len(row) else None
+        if raw_id is None:
             continue
+        # Whole-number IDs read as floats (1001.0) are keyed like the file names ("1001")
+        if isinstance(raw_id, float) and raw_id.is_integer():
+            raw_id = int(raw_id)
         inv_id = str(raw_id).strip()
+        if not inv_id:
+            continue
 
         # Helper to clean numbers
         def get_val(key):
-            if key not in col_map:
+            pos = col_pos.get(key)
+            if pos is None or pos >= len(row):
                 return 0.0
-            val = row.get(col_map[key])
+            val = row[pos]
             try:
-                if pd.isna(val): return 0.0
+                if val is None: return 0.0
                 if isinstance(val, (int, float)): return float(val)
                 # Simple string cleanup
                 clean_str = str(val).replace(',', '').replace('$', '').strip()
@@ -1,5 +1,6 @@
 from .extractor import SheetExtractor
 import openpyxl
+from core.sheet_grid import SheetGrid
 from pathlib import Path
 from typing import Dict, Any, List, Set, Optional
 
@@ -35,7 +36,8 @@ class InvoiceVerifier:
              return result
 
         try:
-            wb = openpyxl.load_workbook(file_path, data_only=True)
+            # Read-only: each target sheet is streamed once into a SheetGrid below
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
         except Exception as e:
             result['status'] = 'ERROR'
             result['details'].append(f"Could not open file: {e}")
@@ -57,20 +59,32 @@ class InvoiceVerifier:
             'packing list': 'Packing List',
             'contract': 'Contract'
         }
+        
+        # Find each target's actual sheet (first title containing it) in one pass over the titles
+        real_names = {}
+        for s, name in sheet_map.items():
+            for sheet_key in target_sheets:
+                if sheet_key not in real_names and sheet_key in s:
+                    real_names[sheet_key] = name
+            if len(real_names) == len(target_sheets):
+                break
+        
+        # Snapshot each matched sheet's values once, then release the file
+        grids = {}
+        try:
+            for real_name in real_names.values():
+                if real_name not in grids:
+                    grids[real_name] = SheetGrid(wb[real_name])
+        finally:
+            wb.close()
 
         for sheet_key, display_name in target_sheets.items():
-            # Find actual sheet name
-            real_name = None
-            for s in sheet_map:
-                if sheet_key in s:
-                    real_name = sheet_map[s]
-                    break
-            
+            real_name = real_names.get(sheet_key)
             if not real_name:
                 continue
 
             observed_sheets.add(display_name)
-            sheet = wb[real_name]
+            sheet = grids[real_name]
             
             # Extract
             extracted = self.extractor.extract_sheet_data(sheet, sheet_type=sheet_key.replace(' ', '_'))
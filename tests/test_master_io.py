@@ -0,0 +1,91 @@
+import sys
+import os
+import shutil
+import pandas as pd
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.utils import read_master_table, write_master_table
+from services.master_data_service import MasterDataService
+from sheet_verifier.master_loader import load_master_list
+
+BASE_DIR = Path("tests/temp_master_io")
+
+def check_date_round_trip(failures):
+    """A master Date column must come back as dates, not Excel serial numbers."""
+    master_path = BASE_DIR / "MasterList.xlsx"
+    df = pd.DataFrame({
+        'Invoice No': ['INV-001', 'INV-002'],
+        'Amount': [1000.0, 250.5],
+        'Date': [pd.Timestamp('2024-01-05'), pd.Timestamp('2024-02-29 13:45:00')]
+    })
+    
+    write_master_table(df, master_path)
+    loaded = read_master_table(master_path)
+    print(f"Date column after round trip: {loaded['Date'].tolist()}")
+    
+    if not pd.api.types.is_datetime64_any_dtype(loaded['Date']):
+        failures.append(f"Date column read back as {loaded['Date'].dtype}, not datetime")
+    elif loaded['Date'].tolist() != df['Date'].tolist():
+        failures.append(f"Date values changed: {loaded['Date'].tolist()}")
+    if loaded['Invoice No'].tolist() != df['Invoice No'].tolist():
+        failures.append(f"Invoice No values changed: {loaded['Invoice No'].tolist()}")
+
+def check_paste_into_empty_master(failures):
+    """Pasting into a master with headers but no rows must keep every master column."""
+    master_path = BASE_DIR / "EmptyMaster.csv"
+    columns = ['Invoice No', 'Amount', 'Quantity', 'Notes']
+    pd.DataFrame(columns=columns).to_csv(master_path, index=False)
+    
+    service = MasterDataService(master_path)
+    service.load()
+    rows = [['Invoice No', 'Amount'], ['INV-009', '100'], ['INV-008', '7']]
+    service.apply_paste(rows, {0: 'col_inv_no', 1: 'col_amount'}, is_header=True)
+    print(f"Columns after paste: {list(service.df.columns)}")
+    
+    if list(service.df.columns) != columns:
+        failures.append(f"Paste into empty master changed the columns: {list(service.df.columns)}")
+    if service.df['Invoice No'].tolist() != ['INV-009', 'INV-008']:
+        failures.append(f"Pasted rows missing: {service.df['Invoice No'].tolist()}")
+
+def check_master_loader_ids(failures):
+    """sheet_verifier's master IDs: whole numbers keyed without '.0', blank IDs skipped."""
+    import openpyxl
+    
+    xlsx_path = BASE_DIR / "VerifierMaster.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in [('Invoice No', 'Amount'), (1001, 10), (None, 20), ('   ', 30), ('INV-003', 40)]:
+        ws.append(row)
+    wb.save(xlsx_path)
+    
+    # A blank cell makes pandas read the CSV ID column as floats (1001.0)
+    csv_path = BASE_DIR / "VerifierMaster.csv"
+    pd.DataFrame({'Invoice No': [1001, None, 1002], 'Amount': [10, 20, 30]}).to_csv(csv_path, index=False)
+    
+    for path, expected in ((xlsx_path, ['1001', 'INV-003']), (csv_path, ['1001', '1002'])):
+        ids = sorted(load_master_list(path))
+        print(f"Master IDs from {path.name}: {ids}")
+        if ids != expected:
+            failures.append(f"{path.name}: expected IDs {expected}, got {ids}")
+
+def run_test():
+    shutil.rmtree(BASE_DIR, ignore_errors=True)
+    BASE_DIR.mkdir(parents=True, exist_ok=True)
+    
+    failures = []
+    check_date_round_trip(failures)
+    check_paste_into_empty_master(failures)
+    check_master_loader_ids(failures)
+    
+    if not failures:
+        print("\nSUCCESS: Master List saves, pastes and ID loading keep the expected columns and keys.")
+        sys.exit(0)
+    else:
+        print(f"\nFAIL: {failures}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_test()
@@ -0,0 +1,52 @@
+import sys
+import os
+import csv
+import shutil
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.pipeline_service import PipelineService
+
+# IDs the filename regex can't find on its own ("SO 4471" has a space, "260015" no letters)
+MASTER_IDS = ('SO 4471', '260015', 'INV-001')
+
+def run_test():
+    base_dir = Path("tests/temp_pipeline_test")
+    shutil.rmtree(base_dir, ignore_errors=True)
+    base_dir.mkdir(parents=True, exist_ok=True)
+    
+    master_path = base_dir / "MasterList.csv"
+    with open(master_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(('Invoice No', 'Amount'))
+        for inv_id in MASTER_IDS:
+            writer.writerow((inv_id, 1000.0))
+    
+    # Any workbook the extractor can read; only the file names matter here
+    fixture = Path("tests/temp_strict/test_valid.xlsx")
+    for name in ("SO 4471 shipment.xlsx", "Copy of 260015.xlsx"):
+        shutil.copyfile(fixture, base_dir / name)
+    
+    print("Running PipelineService...")
+    output = PipelineService(str(base_dir), str(master_path)).run()
+    
+    found = sorted(r['invoice_id'] for r in output['results'])
+    missing = sorted(output['missing'])
+    print(f"Extracted IDs: {found}")
+    print(f"Missing IDs: {missing}")
+    
+    failures = []
+    if found != ['260015', 'SO 4471']: failures.append(f"Known IDs not matched from file names: {found}")
+    if missing != ['INV-001']: failures.append(f"Unexpected missing IDs: {missing}")
+    
+    if not failures:
+        print("\nSUCCESS: File names matched against master IDs through PipelineService.")
+        sys.exit(0)
+    else:
+        print(f"\nFAIL: {failures}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run_test()
@@ -1,8 +1,8 @@
 
 import sys
 import os
-import pandas as pd
-import openpyxl
+import csv
+import hashlib
 from pathlib import Path
 
 # Add project root to sys.path
@@ -12,63 +12,110 @@ from sheet_verifier.verifier import InvoiceVerifier
 from sheet_verifier.master_loader import load_master_list
 from core.exceptions import ErrorCode
 
+MASTER_HEADER = ('Invoice No', 'Amount', 'Quantity', 'Pallets', 'PCS', 'Net Weight', 'Gross Weight', 'CBM')
+MASTER_ROW = ('INV-001', 1000.0, 500.0, 10.0, 5000, 200.0, 220.0, 1.5)
+
+# Contract Sheet (Required for Amount/Qty), same in every scenario
+CONTRACT_ROWS = (
+    ("Invoice No", "Amount", "Quantity"),
+    ("INV-001", "", ""),
+    ("Total:", 1000, 500) # For partition_mismatch it is valid here, but Invoice has 900 -> Mismatch
+)
+
+# Packing List Sheet (Required for Qty/Pallet/Pcs/Net/Gross/CBM), same in every scenario
+PACKING_LIST_ROWS = (
+    ("Invoice No", "Quantity", "Pallet", "PCS", "Net Weight", "Gross Weight", "CBM"),
+    ("INV-001", "", "", "", "", "", ""),
+    ("Total:", 500, 10, 5000, 200, 220, 1.5) # Data in Total Row
+)
+
+# Invoice sheet (headers, total row) per scenario
+INVOICE_SCENARIOS = {
+    'valid': (["Invoice No", "Amount", "Quantity", "Pallet No"], ["Total:", 1000, 500, 10]),
+    'missing_col': (["Invoice No", "Quantity", "Pallet No"], ["Total:", 500, 10]), # Missing Amount
+    'invalid_value': (["Invoice No", "Amount", "Quantity", "Pallet No"], ["Total:", "TBD", 500, 10]), # Invalid Amount "TBD"
+    'partition_mismatch': (["Invoice No", "Amount", "Quantity", "Pallet No"], ["Total:", 900, 500, 10]), # Amount mismatch (1000 expected)
+}
+
+def fixture_digest(sheets):
+    """Content hash of a fixture's {sheet title: rows} spec."""
+    spec = repr([(title, [tuple(row) for row in rows]) for title, rows in sheets.items()])
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+def digest_path(path):
+    """
+    Sidecar file next to a fixture holding the digest of the spec it was built from.
+    It is committed with the fixture, so a fresh checkout reuses the tracked workbooks.
+    """
+    return Path(path).with_name(Path(path).name + ".sha256")
+
+def is_fixture_current(path, digest):
+    """True if path exists and was built from a spec with this digest."""
+    try:
+        return Path(path).exists() and digest_path(path).read_text(encoding='utf-8').strip() == digest
+    except FileNotFoundError:
+        return False
+
 def create_dummy_master_list(path):
-    data = {
-        'Invoice No': ['INV-001'],
-        'Amount': [1000.0],
-        'Quantity': [500.0],
-        'Pallets': [10.0],
-        'PCS': [5000],
-        'Net Weight': [200.0],
-        'Gross Weight': [220.0],
-        'CBM': [1.5]
-    }
-    df = pd.DataFrame(data)
-    df.to_csv(path, index=False)
+    # Written straight with csv; a DataFrame only to call to_csv is overkill for one row
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(MASTER_HEADER)
+        writer.writerow(MASTER_ROW)
     print(f"Created dummy Master List at {path}")
 
 def create_test_excel(path, scenario):
-    wb = openpyxl.Workbook()
-    
-    # 1. Invoice Sheet (Always present, but maybe missing cols)
-    ws_inv = wb.active
-    ws_inv.title = "Invoice"
-    
     # Determine columns and total row values
-    if scenario == 'valid':
-        headers = ["Invoice No", "Amount", "Quantity", "Pallet No"]
-        total_vals = ["Total:", 1000, 500, 10]
-    elif scenario == 'missing_col':
-        headers = ["Invoice No", "Quantity", "Pallet No"] # Missing Amount
-        total_vals = ["Total:", 500, 10]
-    elif scenario == 'invalid_value':
-        headers = ["Invoice No", "Amount", "Quantity", "Pallet No"]
-        total_vals = ["Total:", "TBD", 500, 10] # Invalid Amount "TBD"
-    elif scenario == 'partition_mismatch':
-        headers = ["Invoice No", "Amount", "Quantity", "Pallet No"]
-        total_vals = ["Total:", 900, 500, 10] # Amount mismatch (1000 expected)
+    headers, total_vals = INVOICE_SCENARIOS[scenario]
     
-    ws_inv.append(headers)
-    ws_inv.append(["INV-001", "", "", ""]) # Dummy Line Item
-    ws_inv.append(total_vals) # Total Row with Data
+    sheets = {
+        # 1. Invoice Sheet (Always present, but maybe missing cols)
+        "Invoice": [
+            headers,
+            ["INV-001", "", "", ""], # Dummy Line Item
+            total_vals # Total Row with Data
+        ],
+        # 2. Contract Sheet
+        "Contract": CONTRACT_ROWS,
+        # 3. Packing List Sheet
+        "Packing List": PACKING_LIST_ROWS
+    }
     
-    # 2. Contract Sheet (Required for Amount/Qty)
-    ws_con = wb.create_sheet("Contract")
-    ws_con.append(["Invoice No", "Amount", "Quantity"])
-    ws_con.append(["INV-001", "", ""])
-    if scenario == 'partition_mismatch':
-        ws_con.append(["Total:", 1000, 500]) # Valid here, but Invoice has 900 -> Mismatch
-    else:
-        ws_con.append(["Total:", 1000, 500])
-
-    # 3. Packing List Sheet (Required for Qty/Pallet/Pcs/Net/Gross/CBM)
-    ws_pak = wb.create_sheet("Packing List")
-    ws_pak.append(["Invoice No", "Quantity", "Pallet", "PCS", "Net Weight", "Gross Weight", "CBM"])
-    ws_pak.append(["INV-001", "", "", "", "", "", ""])
-    ws_pak.append(["Total:", 500, 10, 5000, 200, 220, 1.5]) # Data in Total Row
+    digest = fixture_digest(sheets)
+    if is_fixture_current(path, digest):
+        print(f"Reusing test Excel ({scenario}) at {path}")
+        return
+    
+    write_workbook(path, sheets)
+    digest_path(path).write_text(digest, encoding='utf-8')
+    print(f"Created test Excel ({scenario}) at {path}")
 
+def write_workbook(path, sheets):
+    """Writes {sheet title: rows} to an xlsx file, via xlsxwriter if installed, else openpyxl write-only."""
+    try:
+        import xlsxwriter
+    except ImportError:
+        # xlsxwriter not installed, use openpyxl
+        xlsxwriter = None
+    
+    if xlsxwriter is not None:
+        wb = xlsxwriter.Workbook(str(path))
+        for title, rows in sheets.items():
+            ws = wb.add_worksheet(title)
+            for row_idx, row in enumerate(rows):
+                ws.write_row(row_idx, 0, row)
+        wb.close()
+        return
+    
+    import openpyxl
+    
+    # Write-only mode streams rows to disk instead of building a Cell per value
+    wb = openpyxl.Workbook(write_only=True)
+    for title, rows in sheets.items():
+        ws = wb.create_sheet(title)
+        for row in rows:
+            ws.append(row)
     wb.save(path)
-    print(f"Created test Excel ({scenario}) at {path}")
 
 def run_test():
     base_dir = Path("tests/temp_strict")
@@ -80,9 +127,7 @@ def run_test():
     master_data = load_master_list(master_path)
     verifier = InvoiceVerifier()
     
-    scenarios = ['valid', 'missing_col', 'invalid_value', 'partition_mismatch']
-    
-    for sc in scenarios:
+    for sc in INVOICE_SCENARIOS:
         print(f"\n--- Testing Scenario: {sc} ---")
         xlsx_path = base_dir / f"test_{sc}.xlsx"
         create_test_excel(xlsx_path, sc)
@@ -38,9 +38,10 @@ class AppWindow:
         
         # Default Dir
         def_dir = cwd / "process_file_dir"
-        if not def_dir.exists():
-            try: def_dir.mkdir()
-            except: pass
+        try:
+            def_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            print(f"Error creating default folder {def_dir}: {e}")
         if def_dir.exists(): self.folder_path.set(str(def_dir.resolve()))
 
     def _setup_ui(self):
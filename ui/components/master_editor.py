@@ -2,6 +2,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from services.master_data_service import MasterDataService
+from core.utils import write_master_table
 
 class MasterEditor(ttk.Frame):
     def __init__(self, parent, *args, **kwargs):
@@ -71,18 +72,14 @@ class MasterEditor(ttk.Frame):
             self.tree.heading(c, text=c)
             self.tree.column(c, width=100)
             
-        for idx, row in self.service.df.iterrows():
-            vals = [row[c] for c in cols]
+        for idx, *vals in self.service.df.itertuples(index=True, name=None):
             # Use index as iid
             self.tree.insert('', 'end', iid=idx, values=vals)
 
     def save_data(self):
         if not self.service: return
         try:
-            if self.service.master_path.suffix == '.csv':
-                self.service.df.to_csv(self.service.master_path, index=False)
-            else:
-                self.service.df.to_excel(self.service.master_path, index=False)
+            write_master_table(self.service.df, self.service.master_path)
             messagebox.showinfo("Success", "Master List Saved.")
         except Exception as e:
             messagebox.showerror("Error", str(e))